@@ -1,15 +1,16 @@
 import logging
 from typing import Generator
 
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import ValidationError
 from redis.asyncio import Redis
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.security import redis_client
 from app.crud import user as crud
 from app.db.session import SessionLocal
 from app.models import user as models
@@ -43,20 +44,13 @@ def get_mongodb() -> Generator:
     finally:
         client.close()
 
-def get_redis() -> Generator:
+def get_redis() -> Redis:
     """
     Redisセッションの依存関係
+
+    リクエストごとにクライアントを作らず、接続数に上限のある共有プールのクライアントを返す。
     """
-    try:
-        redis = Redis.from_url(settings.REDIS_URL)
-        logger.debug("Redisクライアントを作成しました")
-        yield redis
-    except Exception as e:
-        logger.error(f"Redisの接続に失敗しました: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Redisの接続に失敗しました"
-        )
+    return redis_client
 
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
@@ -79,7 +73,7 @@ def get_current_user(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
         token_data = schemas.TokenPayload(**payload)
-    except (JWTError, ValidationError):
+    except (jwt.PyJWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="認証情報が無効です",
@@ -28,6 +28,7 @@ def login_password(
     - **username**: メールアドレス
     - **password**: パスワード
     """
+    # 同期ルートなので、ハッシュ検証・DB操作はすべてFastAPIのスレッドプールで実行される
     user = crud.authenticate(
         db, email=form_data.username, password=form_data.password
     )
@@ -78,7 +79,7 @@ async def login_github(request: Request):
         session_id = secrets.token_urlsafe(16)
     
     # stateトークンを生成
-    state = generate_state_token(session_id)
+    state = await generate_state_token(session_id)
     
     # GitHub認証URL生成
     params = {
@@ -125,7 +126,7 @@ async def github_callback(
     #         )
         
     #     # stateトークンを検証
-    #     if not verify_state_token(session_id, state):
+    #     if not await verify_state_token(session_id, state):
     #         raise HTTPException(
     #             status_code=status.HTTP_400_BAD_REQUEST,
     #             detail="不正なリクエスト - stateトークンが無効です"
@@ -266,7 +267,7 @@ async def login_google(request: Request):
         session_id = secrets.token_urlsafe(16)
 
     # stateトークンを生成
-    state = generate_state_token(session_id)
+    state = await generate_state_token(session_id)
 
     # Google認証URL生成
     params = {
@@ -317,7 +318,7 @@ async def google_callback(
     #     )
 
     # stateトークンを検証
-    # if not security.verify_state_token(session_id, state):
+    # if not await security.verify_state_token(session_id, state):
     #     raise HTTPException(
     #         status_code=status.HTTP_400_BAD_REQUEST,
     #         detail="不正なリクエスト - stateトークンが無効です"
@@ -1,23 +1,16 @@
-import gc
 import mimetypes
-from contextlib import asynccontextmanager
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import Response
 
 from app.services.redis_service import RedisCacheService
-from app.services.storage_service import StorageService
+from app.services.storage_service import StorageService, storage_service
 
 router = APIRouter()
 
 def get_file_service() -> StorageService:
-    """Fileサービスを取得"""
-    try:
-        return StorageService()
-    except ValueError:
-        raise HTTPException(
-            status_code=500, detail="Failed to initialize TASUKI service. Please check API key configuration."
-        )
+    """Fileサービスを取得（S3クライアントを共有するため、アプリ全体で1つのインスタンスを使う）"""
+    return storage_service
 
 def get_redis_service() -> RedisCacheService:
     """Redisキャッシュサービスを取得"""
@@ -28,20 +21,22 @@ def get_redis_service() -> RedisCacheService:
             status_code=500, detail="Failed to initialize Redis cache service. Please check configuration."
         )
     
-@asynccontextmanager
-async def managed_image_download(storage: StorageService, file_path: str):
-    """メモリ管理付き画像ダウンロード"""
-    contents = None
-    try:
-        contents = await storage.download_file(file_path)
-        yield contents
-    finally:
-        # 明示的なメモリクリーンアップ
-        if contents:
-            del contents
-            # 必要に応じてガベージコレクション
-            if gc.get_count()[0] > 700:
-                gc.collect()
+def guess_image_content_type(file_path: str) -> str:
+    """ファイルパスから画像のMIMEタイプを推測"""
+    content_type, _ = mimetypes.guess_type(file_path)
+    if content_type and content_type.startswith('image/'):
+        return content_type
+    # ファイル拡張子による判定
+    lower_path = file_path.lower()
+    if lower_path.endswith(('.jpg', '.jpeg')):
+        return "image/jpeg"
+    if lower_path.endswith('.png'):
+        return "image/png"
+    if lower_path.endswith('.gif'):
+        return "image/gif"
+    if lower_path.endswith('.webp'):
+        return "image/webp"
+    return "image/jpeg"  # デフォルト
 
 # 画像をフロントエンドに表示するためのプロキシーエンドポイント
 @router.get("/images/{file_path:path}")
@@ -69,43 +64,24 @@ async def get_image(
                     }
                 )
         
-        # キャッシュにない場合はストレージから取得（メモリ管理付き）
-        async with managed_image_download(storage, file_path) as contents:
-            if not contents:
-                raise HTTPException(status_code=404, detail="画像が見つかりません")
-
-            # MIMEタイプの推測を改善
-            content_type, _ = mimetypes.guess_type(file_path)
-            if not content_type or not content_type.startswith('image/'):
-                # ファイル拡張子による判定
-                if file_path.lower().endswith(('.jpg', '.jpeg')):
-                    content_type = "image/jpeg"
-                elif file_path.lower().endswith('.png'):
-                    content_type = "image/png"
-                elif file_path.lower().endswith('.gif'):
-                    content_type = "image/gif"
-                elif file_path.lower().endswith('.webp'):
-                    content_type = "image/webp"
-                else:
-                    content_type = "image/jpeg"  # デフォルト
-            
-            # 小さい画像のみキャッシュに保存
-            if use_cache and len(contents) <= 1024 * 1024 * 5:  # 5MB以下
-                print(f"Caching image {file_path} of size {len(contents)} bytes")
-                await cache_service.cache_image(file_path, contents, content_type)
+        # キャッシュにない場合はストレージから取得し、キャッシュ対象なら同じバイト列をそのまま保存する
+        content_type = guess_image_content_type(file_path)
+        if use_cache:
+            contents = await storage.download_and_cache(file_path, cache_service, content_type)
+        else:
+            contents = await storage.download_file(file_path)
+        if not contents:
+            raise HTTPException(status_code=404, detail="画像が見つかりません")
 
-            # レスポンスデータをコピー（元のcontentsは解放される）
-            response_data = bytes(contents)
-            
-            return Response(
-                content=response_data,
-                media_type=content_type,
-                headers={
-                    "X-Cache": "MISS",
-                    "Cache-Control": "public, max-age=3600",
-                    "Content-Length": str(len(response_data))
-                }
-            )
+        # ダウンロードしたバイト列をコピーせずにそのまま返す（Content-LengthはResponseが設定する）
+        return Response(
+            content=contents,
+            media_type=content_type,
+            headers={
+                "X-Cache": "MISS",
+                "Cache-Control": "public, max-age=3600"
+            }
+        )
         
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="画像が見つかりません")
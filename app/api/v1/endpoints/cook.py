@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from functools import lru_cache
 from typing import List, Optional
 
 from amazon_transcribe.client import TranscribeStreamingClient
@@ -10,6 +11,7 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db, get_mongodb
 from app.core.aws.bedrock_client import BedrockClient
+from app.core.responses import ORJSONResponse
 from app.core.websocket_manager import ws_manager
 from app.schemas.mongo import CookingHistoryDocument, CookingHistoryRequest
 from app.services.bedrock_service import BedrockService
@@ -20,12 +22,17 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+@lru_cache(maxsize=1)
+def _get_shared_bedrock_client() -> BedrockClient:
+    """プロセス内で共有するBedrockクライアント（初期化に失敗した場合はキャッシュされず次回再試行する）"""
+    return BedrockClient()
+
 def get_bedrock_client():
     """
     Amazon Bedrockクライアントの依存関係を取得します。
     """
     try:
-        return BedrockClient()
+        return _get_shared_bedrock_client()
     except Exception as e:
         logger.error(f"Bedrock Client initialization failed: {str(e)}")
         raise HTTPException(
@@ -106,7 +113,8 @@ async def get_cooking_history(
     """
     try:
         history = await service.get_cooking_history(user_id=current_user.id, recipe_id=recipe_id)
-        return history
+        # DBのドキュメントをそのままJSON化する
+        return ORJSONResponse(history)
     except Exception as e:
         logger.error(f"Failed to get cooking history for user {current_user.id}: {str(e)}")
         raise HTTPException(
@@ -225,7 +233,7 @@ async def cook_conversation(
             await stream.input_stream.end_stream()
         if transcription_task:
             transcription_task.cancel()
-        await ws_manager.disconnect(websocket, session_id)
+        await ws_manager.disconnect(connection_id)
         await cooking_service.delete_session(session_id)
         await websocket.close(code=1000, reason="Normal closure")
 
@@ -245,7 +253,7 @@ async def cook_conversation(
         except Exception as e:
             logger.error(f"Error cancelling transcription task: {str(e)}")
         try:
-            await ws_manager.disconnect(websocket, session_id)
+            await ws_manager.disconnect(connection_id)
         except Exception as e:
             logger.error(f"Error disconnecting WebSocket: {str(e)}")
         try:
@@ -8,8 +8,24 @@ from sqlalchemy.orm import Session
 from app.api import deps
 from app.core.aws.bedrock_client import EmbeddingBedrockClient
 from app.core.aws.polly_client import PollyClient
+from app.core.cache import sync_redis_client
 from app.models.user import Users
-from app.schemas.recipe import ExternalService, Ingredient, IngredientCreate, IngredientUpdate, Process, ProcessCreate, ProcessUpdate, Recipe, RecipeList, RecipeStatus, VoiceReaderInput
+from app.schemas.recipe import (
+    ExternalService,
+    Ingredient,
+    IngredientBulkUpdate,
+    IngredientCreate,
+    IngredientUpdate,
+    Process,
+    ProcessBulkUpdate,
+    ProcessCreate,
+    ProcessUpdate,
+    Recipe,
+    RecipeDetail,
+    RecipeList,
+    RecipeStatus,
+    VoiceReaderInput,
+)
 from app.services.recipe_service import RecipeService
 
 # ロガーの設定
@@ -22,7 +38,7 @@ def get_recipe_service(db: Session = Depends(deps.get_db)) -> RecipeService:
     レシピサービスの依存関係を取得します。
     """
     try:
-        return RecipeService(db=db)
+        return RecipeService(db=db, cache=sync_redis_client)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -110,6 +126,20 @@ def get_recipe_by_id(
         raise HTTPException(status_code=404, detail="Recipe not found")
     return recipe
 
+@router.get("/{recipe_id}/details", response_model=RecipeDetail)
+def get_recipe_details(
+    recipe_id: int,
+    recipe_service: RecipeService = Depends(get_recipe_service),
+    current_user: Users = Depends(deps.get_current_user)
+) -> RecipeDetail:
+    """
+    指定されたIDのレシピを材料・手順・ステータス・外部サービス情報込みで取得します。
+    """
+    try:
+        return recipe_service.get_recipe_with_details(recipe_id, current_user.id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+
 @router.get("/{recipe_id}/ingredients", response_model=List[Ingredient])
 def get_ingredients_by_recipe_id(
     recipe_id: int,
@@ -210,6 +240,21 @@ def update_ingredient(
         raise HTTPException(status_code=404, detail="Ingredient not found")
     return updated_ingredient
 
+@router.put("/ingredients", response_model=List[Ingredient])
+def bulk_update_ingredients(
+    ingredients: List[IngredientBulkUpdate],
+    recipe_service: RecipeService = Depends(get_recipe_service),
+    current_user: Users = Depends(deps.get_current_user)
+) -> List[Ingredient]:
+    """
+    複数の材料をまとめて更新します。
+    """
+    logger.info(f"Bulk updating {len(ingredients)} ingredients")
+    try:
+        return recipe_service.bulk_update_ingredients(ingredients)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.delete("/ingredient/{ingredient_id}", response_model=bool)
 def delete_ingredient(
     ingredient_id: int,
@@ -256,6 +301,21 @@ def update_process(
         raise HTTPException(status_code=404, detail="Process not found")
     return updated_process
 
+@router.put("/processes", response_model=List[Process])
+def bulk_update_processes(
+    processes: List[ProcessBulkUpdate],
+    recipe_service: RecipeService = Depends(get_recipe_service),
+    current_user: Users = Depends(deps.get_current_user)
+) -> List[Process]:
+    """
+    複数の調理手順をまとめて更新します。
+    """
+    logger.info(f"Bulk updating {len(processes)} processes")
+    try:
+        return recipe_service.bulk_update_processes(processes)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.delete("/process/{process_id}", response_model=bool)
 def delete_process(
     process_id: int,
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.core.cache import sync_redis_client
 from app.models.user import Users
 from app.schemas.shopping import Shopping, ShoppingCreate, ShoppingItem, ShoppingItemCreate, ShoppingItemUpdate, ShoppingList
 from app.services.recipe_service import RecipeService
@@ -22,7 +23,7 @@ def get_shopping_service(db: Session = Depends(deps.get_db)) -> ShoppingService:
     
 def get_recipe_service(db: Session = Depends(deps.get_db)) -> RecipeService:
     try:
-        return RecipeService(db=db)
+        return RecipeService(db=db, cache=sync_redis_client)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -54,9 +55,15 @@ def create_shopping_list(
     current_user: Users = Depends(deps.get_current_user)
 ):
     # 対象のレシピが存在するか確認
-    recipe = recipe_service.get_recipe_by_id(req.recipe_id, user_id=current_user.id)
+    # 材料も後で使うので同時に読み込む
+    recipe = recipe_service.get_recipe_by_id(req.recipe_id, user_id=current_user.id, with_ingredients=True)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
+
+    # 以降のcommitで読み込み済みの材料が失効しないよう、先に必要な値を取り出しておく
+    ingridients = [(ingredient.ingredient, ingredient.amount) for ingredient in recipe.ingredients]
+    if not ingridients:
+        raise HTTPException(status_code=404, detail="Recipe not found")
     
     shopping = shopping_service.create_list(
         recipe_id=req.recipe_id,
@@ -72,26 +79,20 @@ def create_shopping_list(
     if not user_shopping:
         raise HTTPException(status_code=400, detail="Failed to create user shopping")
     
-    ingridients = recipe_service.get_ingredient_by_recipe_id(req.recipe_id)
-    if not ingridients:
-        raise HTTPException(status_code=404, detail="Recipe not found")
-    
     # shopiingItemようにingridientsを整形
     shopping_items = [  
         ShoppingItemCreate(
             shopping_id=shopping.id,
-            ingredient=ingredient.ingredient,
-            amount=ingredient.amount,
+            ingredient=ingredient,
+            amount=amount,
             is_checked=False,
-            created_date=ingredient.created_date.isoformat(),
-            updated_date=ingredient.updated_date.isoformat()
-        ) for ingredient in ingridients
+        ) for ingredient, amount in ingridients
     ]
-    # 買い物リストにアイテムを追加
-    shopping_items = shopping_service.create_items(
+    # 買い物リストにアイテムを追加（作成した行は応答に使わないので返さない）
+    created_count = shopping_service.create_items_fast(
         items=shopping_items,
     )
-    if not shopping_items:
+    if not created_count:
         raise HTTPException(status_code=400, detail="Failed to create shopping items")  
     return shopping
 
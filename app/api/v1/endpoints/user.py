@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.core.cache import sync_redis_client
 from app.crud import user as crud
 from app.schemas import user as schemas
 from app.schemas.recipe import UserRecipe, UserRecipeUpdate
@@ -19,7 +20,7 @@ def get_recipe_service(db: Session = Depends(deps.get_db)) -> RecipeService:
     レシピサービスの依存関係を取得します。
     """
     try:
-        return RecipeService(db=db)
+        return RecipeService(db=db, cache=sync_redis_client)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -114,7 +115,7 @@ def get_user_recipe(
     ユーザーの特定のレシピ情報を取得
     """
     try:
-        user_recipe = recipe_service.get_user_recipe_by_id(user_id=current_user.id, recipe_id=recipe_id)
+        user_recipe = recipe_service.get_user_recipe(user_id=current_user.id, recipe_id=recipe_id)
         if not user_recipe:
             raise ValueError(f"レシピID {recipe_id} のユーザーレシピが見つかりません。")
         
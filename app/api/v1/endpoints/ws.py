@@ -1,7 +1,8 @@
+import asyncio
 import json
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
 from motor.motor_asyncio import AsyncIOMotorDatabase
@@ -9,11 +10,13 @@ from redis.asyncio import Redis
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.core.websocket_manager import ws_manager
+from app.core.cache import sync_redis_client
+from app.core.responses import ORJSONResponse
+from app.core.websocket_manager import envelope, ws_manager
 from app.models.recipe import Ingredient, Process, Recipe
 from app.models.user import Users
 from app.models.user_recipe import UserRecipe
-from app.schemas.mongo import WebSocketMessage
+from app.schemas.mongo import SessionHistoryDocument, SessionHistoryMessage, SessionHistoryMeta, WebSocketMessage
 from app.services.mongodb_recipe_generation_service import MongoDBRecipeGenerationService
 from app.services.recipe_service import RecipeService
 from app.services.redis_queue_service import RedisQueueService
@@ -22,6 +25,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# セッション履歴を1フレームあたりに送るメッセージ数
+HISTORY_CHUNK_SIZE = 100
+
 
 def get_redis_queue_service(redis_client: Redis = Depends(deps.get_redis)):
     """
@@ -39,7 +45,7 @@ def get_recipe_service(db: Session = Depends(deps.get_db)) -> RecipeService:
     レシピサービスの依存関係を取得します。
     """
     try:
-        return RecipeService(db=db)
+        return RecipeService(db=db, cache=sync_redis_client)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"レシピサービスの初期化に失敗しました: {str(e)}")
 
@@ -67,7 +73,7 @@ async def get_my_session(current_user: Users = Depends(deps.get_current_user), m
         return None
 
 
-@router.get("/session-history")
+@router.get("/session-history", response_model=List[SessionHistoryDocument])
 async def get_session_history(current_user: Users = Depends(deps.get_current_user), mongodb: AsyncIOMotorDatabase = Depends(deps.get_mongodb)):
     """
     セッションの履歴を取得するエンドポイント
@@ -82,13 +88,47 @@ async def get_session_history(current_user: Users = Depends(deps.get_current_use
             return []
 
         logger.info(f"History found for session_id {current_user.id}: {len(history)} messages")
-        return history
+        # DBのドキュメントをそのままJSON化する（ObjectIdは文字列になる）
+        return ORJSONResponse(history)
 
     except Exception as e:
         logger.error(f"Error retrieving history for session_id {current_user.id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve session history")
 
 
+@router.get("/session-history/meta", response_model=List[SessionHistoryMeta])
+async def get_session_history_meta(current_user: Users = Depends(deps.get_current_user), mongodb: AsyncIOMotorDatabase = Depends(deps.get_mongodb)):
+    """
+    セッション履歴の一覧をメタデータのみで取得するエンドポイント（メッセージは個別に取得する）
+    """
+
+    mongo_service = MongoDBRecipeGenerationService(mongodb)
+
+    try:
+        meta = await mongo_service.list_user_sessions_meta(current_user.id)
+        return ORJSONResponse(meta)
+
+    except Exception as e:
+        logger.error(f"Error retrieving history meta for user {current_user.id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve session history")
+
+
+@router.get("/session-history/{session_id}/messages", response_model=List[SessionHistoryMessage])
+async def get_session_history_messages(session_id: str, current_user: Users = Depends(deps.get_current_user), mongodb: AsyncIOMotorDatabase = Depends(deps.get_mongodb)):
+    """
+    指定したセッションのメッセージを取得するエンドポイント
+    """
+
+    mongo_service = MongoDBRecipeGenerationService(mongodb)
+
+    try:
+        return await mongo_service.get_session_messages(session_id, user_id=current_user.id)
+
+    except Exception as e:
+        logger.error(f"Error retrieving messages for session_id {session_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve session messages")
+
+
 @router.websocket("/recipe-gen")
 async def recipe_gen(
     websocket: WebSocket,
@@ -137,11 +177,13 @@ async def recipe_gen(
             logger.info("No recipe parameters provided")
 
         # トークンの検証
-        user = None
+        user_id = None
         if token:
             try:
-                user = deps.get_current_user(db=db, token=token)
-                logger.info(f"User authenticated: {user.id}")
+                # 同期のDB問い合わせを含むため、イベントループをブロックしないようスレッドで実行する
+                user = await asyncio.to_thread(deps.get_current_user, db=db, token=token)
+                user_id = user.id
+                logger.info(f"User authenticated: {user_id}")
             except Exception as e:
                 logger.error(f"Authentication failed: {str(e)}")
                 await websocket.close(code=1008, reason="Invalid authentication token")
@@ -153,11 +195,14 @@ async def recipe_gen(
 
         # セッションの処理
         current_session = None
+        history_messages = []
         is_fast_connect = False
         if session_id and session_id != "":
-            # 既存セッションの検証
+            # 既存セッションの検証（履歴も同じ問い合わせで取得する）
             try:
-                existing_session = await mongo_service.get_session(session_id)
+                bundle = await mongo_service.get_session_with_messages(session_id)
+                existing_session = bundle["session"]
+                history_messages = bundle["messages"]
                 if not existing_session:
                     logger.warning(f"Session not found: {session_id}")
                     await websocket.close(code=1008, reason="Invalid session ID")
@@ -172,7 +217,7 @@ async def recipe_gen(
             # 新しいセッションを作成
             try:
                 is_fast_connect = True
-                current_session = await mongo_service.create_session(user_id=user.id)
+                current_session = await mongo_service.create_session(user_id=user_id)
                 session_id = current_session.session_id
                 logger.info(f"Created new session: {session_id}")
             except Exception as e:
@@ -184,8 +229,8 @@ async def recipe_gen(
         connection_id = await ws_manager.connect(websocket, session_id)
         logger.info(f"WebSocket connected: connection_id={connection_id}, session_id={session_id}")
 
-        # セッション履歴を送信
-        await send_session_history(websocket, mongo_service, session_id)
+        # セッション履歴を送信（新規セッションの履歴は空）
+        await send_session_history(websocket, mongo_service, session_id, messages=history_messages)
 
         if is_fast_connect:
             # 接続確立メッセージを送信
@@ -207,12 +252,12 @@ async def recipe_gen(
                 session_id=session_id,
                 message_type="system_response",
                 content="BAE-RECIPE AIにて動画からレシピを生成します。",
-                metadata={"connection_id": connection_id, "user_id": user.id, "recipe_params": parsed_recipe_params},
+                metadata={"connection_id": connection_id, "user_id": user_id, "recipe_params": parsed_recipe_params},
             )
 
             # recipe_paramsがNoneの場合は空の辞書を使用して安全にタスクをエンキュー
             safe_recipe_params = parsed_recipe_params if parsed_recipe_params is not None else {}
-            task_id = await redis_queue_service.enqueue_recipe_generation_task(session_id=session_id, url=url, user_id=user.id, recipe_params=safe_recipe_params)
+            task_id = await redis_queue_service.enqueue_recipe_generation_task(session_id=session_id, url=url, user_id=user_id, recipe_params=safe_recipe_params)
 
             # タスクIDをセッションに保存
             await mongo_service.add_message_to_history(
@@ -221,7 +266,7 @@ async def recipe_gen(
                 content="BAE-RECIPE AIにて動画からレシピを開始します。",
                 metadata={
                     "connection_id": connection_id,
-                    "user_id": user.id,
+                    "user_id": user_id,
                     "recipe_params": parsed_recipe_params,
                     # "task_id": task_id
                 },
@@ -244,7 +289,7 @@ async def recipe_gen(
 
             # 接続をログに記録
             await mongo_service.add_message_to_history(
-                session_id=session_id, message_type="system_response", content="BAE-RECIPE AIに再接続します。", metadata={"connection_id": connection_id, "user_id": user.id}
+                session_id=session_id, message_type="system_response", content="BAE-RECIPE AIに再接続します。", metadata={"connection_id": connection_id, "user_id": user_id}
             )
 
         # メッセージループ
@@ -282,9 +327,10 @@ async def recipe_gen(
         # クリーンアップ処理
         try:
             if "connection_id" in locals() and "session_id" in locals():
-                ws_manager.disconnect(connection_id, session_id)
+                await ws_manager.disconnect(connection_id)
                 if "mongo_service" in locals():
                     await mongo_service.add_message_to_history(session_id=session_id, message_type="system_response", content="接続が切断されました。", metadata={"connection_id": connection_id})
+                    await mongo_service.flush_now()
         except Exception as e:
             logger.error(f"Cleanup error: {str(e)}")
 
@@ -324,6 +370,7 @@ async def recipe_gen_celery(
     logger.info(f"WebSocket connected: connection_id={connection_id}, session_id={session_id}")
 
     # celeryからのメッセージ受信ループ
+    disconnected = False
     try:
         while True:
             raw_data = await websocket.receive_text()
@@ -341,8 +388,8 @@ async def recipe_gen_celery(
                     metadata={"raw_data": message_data, "connection_id": connection_id},
                 )
 
-                # メッセージをWebSocketで送信
-                await ws_manager.send_personal_message(message_data, session_id)
+                # メッセージをWebSocketで送信（受信したJSONをそのまま転送し再シリアライズしない）
+                await ws_manager.send_personal_message(raw_data, session_id)
 
                 if message_data.get("type") == "task_completed":
                     # レシピの作成
@@ -354,7 +401,8 @@ async def recipe_gen_celery(
                     logger.info(f"Processing task completed results: {results}")
                     if results:
                         try:
-                            recipe = await recipe_service.create_recipe(
+                            # レシピとユーザーレシピは1回のcommitでまとめて作成する
+                            recipe, user_recipe = await recipe_service.create_recipe_with_user_link(
                                 Recipe(
                                     recipe_name=recipe_name,
                                     url=results.get("recipes", {}).get("url", ""),
@@ -363,19 +411,15 @@ async def recipe_gen_celery(
                                     keyword=",".join(keywords),
                                     genrue=genrue,
                                     embedding=embedding,
-                                )
-                            )
-
-                            logger.info(f"Recipe created: {recipe.id}")
-
-                            user_recipe = await recipe_service.create_user_recipe(
-                                UserRecipe(
+                                ),
+                                lambda recipe_id: UserRecipe(
                                     user_id=results.get("user_recipes", {}).get("user_id", None),
-                                    recipe_id=recipe.id,
+                                    recipe_id=recipe_id,
                                     is_favorite=False,  # デフォルトはお気に入りではない
-                                )
+                                ),
                             )
 
+                            logger.info(f"Recipe created: {recipe.id}")
                             logger.info(f"UserRecipe created: {user_recipe.id}")
 
                             # 材料の作成
@@ -390,13 +434,12 @@ async def recipe_gen_celery(
                                 ]
                             )
 
-                            logger.info(f"Ingredients created: {[ing.id for ing in ingredients]}")
-
                             # 調理手順の作成
                             processes = await recipe_service.create_processes(
                                 [Process(recipe_id=recipe.id, process=proc.get("process", ""), process_number=proc.get("process_number", "")) for proc in results.get("processes", [])]
                             )
 
+                            logger.info(f"Ingredients created: {[ing.id for ing in ingredients]}")
                             logger.info(f"Processes created: {[proc.id for proc in processes]}")
 
                             # 完了通知をmongoに保存
@@ -413,9 +456,9 @@ async def recipe_gen_celery(
                                 },
                             )
                             await ws_manager.send_personal_message(
-                                {
-                                    "type": "all_tasks_completed",
-                                    "data": {
+                                envelope(
+                                    "all_tasks_completed",
+                                    {
                                         "recipe_id": recipe.id,
                                         "user_recipe_id": user_recipe.id,
                                         "ingredients": [ing.id for ing in ingredients],
@@ -426,9 +469,9 @@ async def recipe_gen_celery(
                                         "progress": 100,
                                         "content": "レシピの生成が完了しました。",
                                     },
-                                    "session_id": session_id,
-                                    "timestamp": datetime.utcnow().isoformat(),
-                                },
+                                    session_id,
+                                    datetime.utcnow().isoformat().encode(),
+                                ),
                                 session_id,
                             )
 
@@ -439,8 +482,8 @@ async def recipe_gen_celery(
                             await send_error_message(websocket, mongo_service, session_id, f"Error creating recipe: {str(e)}")
                             await mongo_service.delete_session(session_id)
                             return
-
-                    await mongo_service.delete_session(session_id)
+                    else:
+                        await mongo_service.delete_session(session_id)
 
                 if message_data.get("type") == "task_failed":
                     logger.error(f"Task failed for session {session_id}: {message_data.get('data', {}).get('error', 'Unknown error')}")
@@ -454,43 +497,76 @@ async def recipe_gen_celery(
                 await websocket.send_json({"type": "error", "data": {"message": f"Message processing error: {str(e)}"}, "session_id": session_id, "timestamp": datetime.utcnow().isoformat()})
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for session: {session_id}")
-        ws_manager.disconnect(connection_id, session_id)
+        await ws_manager.disconnect(connection_id)
+        disconnected = True
     finally:
-        # クリーンアップ処理
+        # クリーンアップ処理（切断処理は一度だけ行う）
         try:
             if "connection_id" in locals() and "session_id" in locals():
-                ws_manager.disconnect(connection_id, session_id)
+                if not disconnected:
+                    await ws_manager.disconnect(connection_id)
+                    disconnected = True
                 if "mongo_service" in locals():
                     await mongo_service.add_message_to_history(session_id=session_id, message_type="system_response", content="Celery接続が切断されました。", metadata={"connection_id": connection_id})
+                    await mongo_service.flush_now()
         except Exception as e:
             logger.error(f"Cleanup error: {str(e)}")
 
 
-async def send_session_history(websocket: WebSocket, mongo_service: MongoDBRecipeGenerationService, session_id: str):
-    """セッション履歴を送信"""
-    try:
-        messages = await mongo_service.get_session_messages(session_id)
+async def _chunked(cursor: Union[AsyncIterator[Dict[str, Any]], List[Dict[str, Any]]], size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    """非同期イテレータ（または取得済みのリスト）からsize件ずつまとめて返す"""
+    if isinstance(cursor, list):
+        for i in range(0, len(cursor), size):
+            yield cursor[i : i + size]
+        return
 
-        if messages:
-            history_response = {
-                "type": "session_history",
-                "data": {
-                    "messages": [{"message_id": msg.message_id, "type": msg.message_type, "content": msg.content, "metadata": msg.metadata, "timestamp": msg.timestamp.isoformat()} for msg in messages]
-                },
-                "session_id": session_id,
-                "timestamp": datetime.utcnow().isoformat(),
-            }
+    batch: List[Dict[str, Any]] = []
+    async for item in cursor:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def send_session_history(websocket: WebSocket, mongo_service: MongoDBRecipeGenerationService, session_id: str, messages: Optional[List[Dict[str, Any]]] = None):
+    """セッション履歴をHISTORY_CHUNK_SIZE件ずつのフレームに分けて送信
+
+    messagesが渡された場合はそれを送信し、省略時はMongoDBからカーソルで読み出す。
+    """
+    try:
+        sent = 0
+        if messages is None:
+            await mongo_service.flush_now()
+        source = messages if messages is not None else mongo_service.iter_session_messages(session_id, batch_size=HISTORY_CHUNK_SIZE)
+        async for batch in _chunked(source, HISTORY_CHUNK_SIZE):
+            await websocket.send_json(
+                {
+                    "type": "session_history_chunk",
+                    "data": {
+                        "messages": [
+                            {"message_id": msg["message_id"], "type": msg["message_type"], "content": msg["content"], "metadata": msg.get("metadata") or {}, "timestamp": msg["timestamp"].isoformat()}
+                            for msg in batch
+                        ]
+                    },
+                    "session_id": session_id,
+                    "timestamp": datetime.utcnow().isoformat(),
+                }
+            )
+            sent += len(batch)
 
-            await websocket.send_json(history_response)
-            logger.info(f"Sent session history for session: {session_id}")
+        if sent:
+            await websocket.send_json({"type": "session_history_end", "data": {"total": sent}, "session_id": session_id, "timestamp": datetime.utcnow().isoformat()})
+            logger.info(f"Sent session history for session: {session_id} ({sent} messages)")
     except Exception as e:
         logger.error(f"Error sending session history: {str(e)}")
 
 
-async def send_response(websocket: WebSocket, mongo_service: MongoDBRecipeGenerationService, session_id: str, message_type: str, data: dict):
+async def send_response(websocket: WebSocket, mongo_service: MongoDBRecipeGenerationService, session_id: str, message_type: str, data: dict, ts: Optional[bytes] = None):
     """レスポンスメッセージを送信"""
     try:
-        response = {"type": message_type, "data": data, "session_id": session_id, "timestamp": datetime.utcnow().isoformat()}
+        response = envelope(message_type, data, session_id, ts or datetime.utcnow().isoformat().encode())
 
         # メッセージを送信
         if await ws_manager.send_personal_message(response, session_id):
@@ -503,4 +579,5 @@ async def send_response(websocket: WebSocket, mongo_service: MongoDBRecipeGenera
 
 async def send_error_message(websocket: WebSocket, mongo_service: MongoDBRecipeGenerationService, session_id: str, error_message: str):
     """エラーメッセージを送信"""
-    await send_response(websocket, mongo_service, session_id, "error", {"message": error_message, "timestamp": datetime.utcnow().isoformat()})
+    ts = datetime.utcnow().isoformat()
+    await send_response(websocket, mongo_service, session_id, "error", {"message": error_message, "timestamp": ts}, ts=ts.encode())
@@ -0,0 +1,31 @@
+from redis import BlockingConnectionPool, Redis
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
+from redis.asyncio import Redis as AsyncRedis
+
+from app.core.config import settings
+
+# 同期エンドポイント（スレッドプールで実行される）から使うRedisクライアント。
+# 接続数に上限を設けたプールを使い回し、上限到達時は最大2秒待機する
+_sync_redis_pool = BlockingConnectionPool(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=0,
+    max_connections=32,
+    timeout=2,
+    health_check_interval=30,
+    socket_keepalive=True,
+    socket_timeout=1,
+)
+sync_redis_client = Redis(connection_pool=_sync_redis_pool)
+
+# 画像キャッシュ用の非同期Redisクライアント（バイナリをそのまま扱うためdecode_responses=False）。
+# リクエストごとに接続を作らずプロセス全体で共有する。hiredisがインストールされていれば応答の解析はC実装で行われる
+_cache_redis_pool = AsyncBlockingConnectionPool.from_url(
+    settings.REDIS_URL,
+    max_connections=50,
+    timeout=2,
+    health_check_interval=30,
+    socket_keepalive=True,
+    decode_responses=False,
+)
+cache_redis_client = AsyncRedis(connection_pool=_cache_redis_pool)
@@ -18,6 +18,9 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60 * 24))  # 1日
 
+    # パスワードハッシュ（bcryptのコスト）
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+
     # OAuth設定
     GITHUB_CLIENT_ID: Optional[str] = os.getenv("GITHUB_CLIENT_ID")
     GITHUB_CLIENT_SECRET: Optional[str] = os.getenv("GITHUB_CLIENT_SECRET")
@@ -46,6 +49,15 @@ class Settings(BaseSettings):
     # SQLAlchemy
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
 
+    # DB接続プール設定
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", 30))  # 秒
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 60))  # 秒
+    # PgBouncer（transactionモード）経由で接続する場合はtrue。
+    # 接続の死活はPgBouncer側が管理するため、チェックアウトごとのpre-pingを行わない
+    PGBOUNCER_TRANSACTION_MODE: bool = os.getenv("PGBOUNCER_TRANSACTION_MODE", "false")
+
     # MinIO設定
     MINIO_ENDPOINT_URL: str = os.getenv("MINIO_ENDPOINT_URL")
     MINIO_ACCESS_KEY_ID: str = os.getenv("MINIO_ACCESS_KEY_ID", "minioadmin")
@@ -0,0 +1,34 @@
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# リクエスト開始時刻（HTTPリクエストごとに一度だけ取得する）
+_REQUEST_NOW: ContextVar[Optional[datetime]] = ContextVar("request_now", default=None)
+
+
+def request_now() -> datetime:
+    """現在のリクエストの開始時刻を返す（リクエスト外やWebSocketでは現在時刻）"""
+    return _REQUEST_NOW.get() or datetime.utcnow()
+
+
+class RequestNowMiddleware:
+    """HTTPリクエストごとに開始時刻をコンテキスト変数へ設定するASGIミドルウェア
+
+    WebSocketは接続が長時間続くため対象外とし、request_now()は都度現在時刻を返す。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _REQUEST_NOW.set(datetime.utcnow())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _REQUEST_NOW.reset(token)
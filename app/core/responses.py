@@ -0,0 +1,22 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+
+
+def orjson_default(obj: Any) -> Any:
+    """orjsonが標準で扱えない型（MongoDBのObjectIdやDecimal）をJSON化する"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """orjsonでシリアライズするレスポンス（ObjectId/Decimalにも対応）"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=orjson_default, option=orjson.OPT_SERIALIZE_NUMPY)
@@ -1,26 +1,36 @@
+import hmac
 import secrets
-from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+import time
+from datetime import timedelta
+from typing import Any, Optional, Tuple, Union
 
-from jose import jwt
+import jwt
 from passlib.context import CryptContext
-from redis import Redis
+from redis.asyncio import BlockingConnectionPool, Redis
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# スキーム・コスト・識別子を固定し、呼び出しごとの設定解決を避ける
+# 新規ハッシュはArgon2id。既存のbcryptハッシュは検証可能なまま非推奨扱いとし、ログイン成功時に再ハッシュする
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    default="argon2",
+    argon2__type="ID",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__ident="2b",
+    deprecated="auto",
+)
 
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
 ) -> str:
     """アクセストークンを作成"""
+    # expはNumericDate（エポック秒）なので整数演算で求める
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = int(time.time()) + int(expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        )
+        expire = int(time.time()) + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
     to_encode = {"exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
@@ -35,9 +45,30 @@ def get_password_hash(password: str) -> str:
     """パスワードハッシュを生成"""
     return pwd_context.hash(password)
 
-redis_client = Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=0, decode_responses=True)
 
-def generate_state_token(session_id: str) -> str:
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """パスワードを検証し、ハッシュが旧方式なら新しいハッシュも返す
+
+    Returns:
+        (検証結果, 再ハッシュ後の値。更新不要ならNone)
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# 接続数に上限を設けたプールを使い回す（上限到達時は最大2秒待機）。
+# アイドル後の切断済み接続はヘルスチェックで検出して張り直す
+_redis_pool = BlockingConnectionPool(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=0,
+    max_connections=32,
+    timeout=2,
+    health_check_interval=30,
+    socket_keepalive=True,
+)
+redis_client = Redis(connection_pool=_redis_pool)
+
+async def generate_state_token(session_id: str) -> str:
     """
     OAuth認証用のstateトークンを生成し、Redisに保存
     
@@ -51,11 +82,11 @@ def generate_state_token(session_id: str) -> str:
     
     # Redisにstateトークンを保存 (10分間有効)
     key = f"oauth_state:{session_id}"
-    redis_client.setex(key, 600, state)
+    await redis_client.set(key, state, ex=600)
     
     return state
 
-def verify_state_token(session_id: str, state: str) -> bool:
+async def verify_state_token(session_id: str, state: str) -> bool:
     """
     stateトークンを検証し、使用後に削除
     
@@ -67,12 +98,8 @@ def verify_state_token(session_id: str, state: str) -> bool:
         検証結果 (有効な場合True)
     """
     key = f"oauth_state:{session_id}"
-    stored_state = redis_client.get(key)
-    
-    # トークンが存在し、値が一致する場合に検証成功
-    if stored_state and stored_state == state:
-        # 使用済みトークンを削除（再利用防止）
-        redis_client.delete(key)
-        return True
+    # GETDELで取得と削除（再利用防止）を1コマンドでアトミックに行う
+    stored_state = await redis_client.getdel(key)
     
-    return False
\ No newline at end of file
+    # トークンが存在し、値が一致する場合に検証成功（タイミング差の出ない比較を使う）
+    return stored_state is not None and hmac.compare_digest(stored_state, state.encode())
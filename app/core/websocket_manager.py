@@ -1,60 +1,132 @@
+import asyncio
 import logging
 import uuid
-from typing import Dict, Set
+from typing import Any, Dict, FrozenSet, NamedTuple, Union
 
+import orjson
 from fastapi import WebSocket
 
 logger = logging.getLogger(__name__)
 
 
+def envelope(type_: str, data: Any, session_id: str, ts: bytes) -> bytes:
+    """{"type", "data", "session_id", "timestamp"} 形式のメッセージを中間dictを作らずJSONバイト列として組み立てる"""
+    return b'{"type":' + orjson.dumps(type_) + b',"data":' + orjson.dumps(data) + b',"session_id":' + orjson.dumps(session_id) + b',"timestamp":"' + ts + b'"}'
+
+
+class _ConnectionState(NamedTuple):
+    """接続情報のスナップショット（変更時は書き換えず新しいインスタンスに差し替える）"""
+
+    active: Dict[str, WebSocket]  # connection_id -> websocket
+    sessions: Dict[str, FrozenSet[str]]  # session_id -> set of connection_ids
+    conn_session: Dict[str, str]  # connection_id -> session_id
+
+
+# シャード数（2のべき乗にしてハッシュ値のマスクで選べるようにする）
+_SHARD_COUNT = 16
+
+
+class _Shard:
+    """セッションIDのハッシュで振り分けられた接続情報の断片（スナップショットと書き込み用ロックを持つ）"""
+
+    __slots__ = ("state", "lock")
+
+    def __init__(self):
+        self.state = _ConnectionState(active={}, sessions={}, conn_session={})
+        self.lock = asyncio.Lock()
+
+
 class WebSocketConnectionManager:
-    """WebSocket接続管理クラス（複数接続対応）"""
+    """WebSocket接続管理クラス（複数接続対応）
+
+    接続情報はセッションIDのハッシュで16個のシャードに分割し、シャードごとにコピーオンライトで管理する。
+    書き込み（connect/disconnect）は該当シャードのロック下で新しいスナップショットに差し替えるため、
+    別シャードのセッション同士は競合しない。読み取りはスナップショットを参照するだけなのでロック不要。
+    """
 
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}  # connection_id -> websocket
-        self.session_connections: Dict[str, Set[str]] = {}  # session_id -> set of connection_ids
+        self._shards = tuple(_Shard() for _ in range(_SHARD_COUNT))
+
+    def _shard_for(self, session_id: str) -> _Shard:
+        return self._shards[hash(session_id) & (_SHARD_COUNT - 1)]
+
+    @property
+    def active_connections(self) -> Dict[str, WebSocket]:
+        return {conn_id: ws for shard in self._shards for conn_id, ws in shard.state.active.items()}
+
+    @property
+    def session_connections(self) -> Dict[str, FrozenSet[str]]:
+        return {session_id: conns for shard in self._shards for session_id, conns in shard.state.sessions.items()}
 
     async def connect(self, websocket: WebSocket, session_id: str) -> str:
         await websocket.accept()
         connection_id = str(uuid.uuid4())
-        self.active_connections[connection_id] = websocket
-        if session_id not in self.session_connections:
-            self.session_connections[session_id] = set()
-        self.session_connections[session_id].add(connection_id)
-        logger.info(f"WebSocket connected: {self.session_connections[session_id]}")
+        shard = self._shard_for(session_id)
+        async with shard.lock:
+            state = shard.state
+            shard.state = _ConnectionState(
+                active={**state.active, connection_id: websocket},
+                sessions={**state.sessions, session_id: state.sessions.get(session_id, frozenset()) | {connection_id}},
+                conn_session={**state.conn_session, connection_id: session_id},
+            )
+        logger.info(f"WebSocket connected: {connection_id} (session: {session_id})")
         return connection_id
 
-    def disconnect(self, connection_id: str, session_id: str):
-        if connection_id in self.active_connections:
-            del self.active_connections[connection_id]
-        if session_id in self.session_connections:
-            self.session_connections[session_id].discard(connection_id)
-            if not self.session_connections[session_id]:
-                del self.session_connections[session_id]
-
-    async def send_personal_message(self, message: dict, session_id: str):
-        """特定セッションに属するすべての接続へ送信"""
-        connection_ids = self.session_connections.get(session_id, set())
-        disconnected_ids = set()
-        for conn_id in connection_ids:
-            ws = self.active_connections.get(conn_id)
-            logger.info(f"Sending message to {session_id} via connection {conn_id}")
-            if ws:
-                try:
-                    await ws.send_json(message)
-                except Exception as e:
-                    logger.info(f"Failed to send message to {session_id}: {e}")
-                    disconnected_ids.add(conn_id)
-        # 切断された接続をクリーンアップ
-        for conn_id in disconnected_ids:
-            self.disconnect(conn_id, session_id)
-        return len(connection_ids) > 0
+    async def disconnect(self, connection_id: str):
+        """接続を登録解除する（同じ接続に対して複数回呼ばれても安全）"""
+        # 接続IDからはシャードが分からないので、各シャードのスナップショットから探す
+        shard = next((shard for shard in self._shards if connection_id in shard.state.conn_session), None)
+        if shard is None:
+            return
+
+        async with shard.lock:
+            state = shard.state
+            if connection_id not in state.conn_session:
+                return
+
+            active = dict(state.active)
+            active.pop(connection_id, None)
+            conn_session = dict(state.conn_session)
+            session_id = conn_session.pop(connection_id)
+            sessions = dict(state.sessions)
+            remaining = sessions.get(session_id, frozenset()) - {connection_id}
+            if remaining:
+                sessions[session_id] = remaining
+            else:
+                sessions.pop(session_id, None)
+            shard.state = _ConnectionState(active=active, sessions=sessions, conn_session=conn_session)
+
+    async def send_personal_message(self, message: Union[dict, bytes, str], session_id: str):
+        """特定セッションに属するすべての接続へ並行して送信
+
+        dictは一度だけJSONにシリアライズして全接続で使い回す。
+        bytes/strはenvelope()などでJSON化済みのメッセージとしてそのまま送る。
+        """
+        if isinstance(message, dict):
+            message = orjson.dumps(message)
+        text = message.decode() if isinstance(message, bytes) else message
+
+        # スナップショットを参照するだけなのでロックは不要
+        state = self._shard_for(session_id).state
+        targets = [(conn_id, state.active[conn_id]) for conn_id in state.sessions.get(session_id, ()) if conn_id in state.active]
+
+        logger.info(f"Sending message to {session_id} via {len(targets)} connection(s)")
+        results = await asyncio.gather(
+            *(ws.send_text(text) for _, ws in targets),
+            return_exceptions=True,
+        )
+        # 送信に失敗した接続をクリーンアップ
+        for (conn_id, _), result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.info(f"Failed to send message to {session_id}: {result}")
+                await self.disconnect(conn_id)
+        return len(targets) > 0
 
     def is_session_connected(self, session_id: str) -> bool:
-        return session_id in self.session_connections and bool(self.session_connections[session_id])
+        return bool(self._shard_for(session_id).state.sessions.get(session_id))
 
     def get_connected_sessions(self) -> list:
-        return list(self.session_connections.keys())
+        return [session_id for shard in self._shards for session_id in shard.state.sessions]
 
 
 # グローバルインスタンス
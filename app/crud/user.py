@@ -3,7 +3,7 @@ from typing import Any, Dict, Optional, Union
 
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verify_and_update_password
 from app.models.user import Users
 from app.schemas.user import UserCreate, UserOAuthCreate, UserUpdate
 
@@ -12,7 +12,7 @@ def get(db: Session, user_id: int) -> Optional[Users]:
     """
     IDでユーザーを取得
     """
-    return db.query(Users).filter(Users.id == user_id).first()
+    return db.get(Users, user_id)
 
 
 def update(db: Session, *, db_obj: Users, obj_in: Union[UserUpdate, Dict[str, Any]]) -> Users:
@@ -92,14 +92,22 @@ def create_oauth_user(db: Session, *, obj_in: UserOAuthCreate) -> Users:
 
 
 def authenticate(db: Session, *, email: str, password: str) -> Optional[Users]:
-    """パスワード認証"""
+    """パスワード認証
+
+    旧方式（bcrypt）のハッシュで認証に成功した場合はArgon2idで再ハッシュして保存する。
+    """
     user = get_by_email(db, email=email)
     if not user:
         return None
     if not user.hashed_password:
         return None
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        user.hashed_password = new_hash
+        db.add(user)
+        db.commit()
     return user
 
 
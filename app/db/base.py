@@ -2,9 +2,7 @@
 from app.db.base_class import Base # noqa
 
 # Recipeモデルをインポート
-from app.models.recipe import Recipe, ExternalService, RecipeStatus # noqa
-from app.models.recipe import Ingredient # noqa
-from app.models.recipe import Process # noqa
+from app.models.recipe import ExternalService, Ingredient, Process, Recipe, RecipeStatus # noqa
 
 # UserRecipeモデルをインポート
 from app.models.user_recipe import UserRecipe # noqa
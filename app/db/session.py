@@ -1,10 +1,20 @@
 from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-Base = declarative_base()
\ No newline at end of file
+# executemany_mode="values_plus_batch": 複数行INSERTは1文のVALUESにまとめ、UPDATE/DELETEのexecutemanyもexecute_batchで送る（psycopg2）
+# insertmanyvalues_page_size: 1文にまとめるINSERTの最大行数
+# 接続プールの大きさ・再利用時間は設定値で調整する（PgBouncer経由の場合はpre-pingを無効にする）
+engine = create_engine(
+    settings.SQLALCHEMY_DATABASE_URI,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=not settings.PGBOUNCER_TRANSACTION_MODE,
+    executemany_mode="values_plus_batch",
+    insertmanyvalues_page_size=1000,
+)
+# expire_on_commit=False: commit後も読み込み済みの属性を保持し、次の属性アクセスで再読み込みのSELECTが走らないようにする
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""add user_recipes user_id recipe_id index
+
+Revision ID: 4b8e1f2a9c3d
+Revises: f22d6229620a
+Create Date: 2025-06-24 10:12:05.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8e1f2a9c3d'
+down_revision: Union[str, None] = 'f22d6229620a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_user_recipes_user_id_recipe_id', 'user_recipes', ['user_id', 'recipe_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_recipes_user_id_recipe_id', table_name='user_recipes')
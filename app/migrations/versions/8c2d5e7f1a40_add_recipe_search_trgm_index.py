@@ -0,0 +1,32 @@
+"""add recipe search trigram index
+
+Revision ID: 8c2d5e7f1a40
+Revises: 4b8e1f2a9c3d
+Create Date: 2025-06-25 09:41:17.202645
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2d5e7f1a40'
+down_revision: Union[str, None] = '4b8e1f2a9c3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # RecipeServiceのキーワード検索と同じ式にする（concat_wsはIMMUTABLEではないため || と coalesce で組み立てる）
+    op.execute(
+        "CREATE INDEX ix_recipes_search_trgm ON recipes USING gin "
+        "((recipe_name || ' ' || coalesce(keyword, '') || ' ' || coalesce(genrue, '')) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_recipes_search_trgm', table_name='recipes')
@@ -1,5 +1,6 @@
 from pgvector.sqlalchemy import Vector
 from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.db.base_class import Base
@@ -15,7 +16,7 @@ class ExternalService(Base):
     updated_date = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
     # リレーションシップ
-    # recipes = relationship("Recipe", back_populates="external_service")
+    recipes = relationship("Recipe", back_populates="external_service")
     
     def __repr__(self):
         return f"<ExternalService(id={self.id}, name={self.services_name})>"
@@ -30,8 +31,8 @@ class RecipeStatus(Base):
     created_date = Column(DateTime, default=func.now(), nullable=False)
     updated_date = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
-    # # リレーションシップ
-    # recipes = relationship("Recipe", back_populates="status")
+    # リレーションシップ
+    recipes = relationship("Recipe", back_populates="status")
     
     def __repr__(self):
         return f"<RecipeStatus(id={self.id}, status={self.status})>"
@@ -53,13 +54,14 @@ class Recipe(Base):
     embedding = Column(Vector(1536), nullable=True, comment="レシピの埋め込みベクトル")
     
     # リレーションシップ
-    # status = relationship("RecipeStatus", back_populates="recipes")
-    # external_service = relationship("ExternalService", back_populates="recipes")
+    status = relationship("RecipeStatus", back_populates="recipes")
+    external_service = relationship("ExternalService", back_populates="recipes")
     
     # 拡張リレーションシップ
-    # ingredients = relationship("Ingredient", back_populates="recipe", cascade="all, delete-orphan")
-    # processes = relationship("Process", back_populates="recipe", cascade="all, delete-orphan")
-    # user_recipes = relationship("UserRecipe", back_populates="recipe", cascade="all, delete-orphan")
+    # 既定では遅延ロードせずエラーにする（必要なクエリでselectinloadなどを明示して読み込む）
+    ingredients = relationship("Ingredient", back_populates="recipe", cascade="all, delete-orphan", lazy="raise")
+    processes = relationship("Process", back_populates="recipe", cascade="all, delete-orphan", lazy="raise")
+    user_recipes = relationship("UserRecipe", back_populates="recipe", cascade="all, delete-orphan", lazy="raise")
     
     def __repr__(self):
         return f"<Recipe(id={self.id}, name={self.recipe_name})>"
@@ -77,7 +79,7 @@ class Ingredient(Base):
     updated_date = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
     # リレーションシップ
-    # recipe = relationship("Recipe", back_populates="ingredients")
+    recipe = relationship("Recipe", back_populates="ingredients")
     
     def __repr__(self):
         return f"<Ingredient(id={self.id}, ingredient={self.ingredient}, amount={self.amount})>"
@@ -95,7 +97,7 @@ class Process(Base):
     updated_date = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
     # リレーションシップ
-    # recipe = relationship("Recipe", back_populates="processes")
+    recipe = relationship("Recipe", back_populates="processes")
     
     __table_args__ = (
         UniqueConstraint("recipe_id", "process_number", name="uq_recipe_process_number"),
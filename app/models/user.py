@@ -1,4 +1,5 @@
 from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.db.base_class import Base
@@ -53,6 +54,16 @@ class Users(Base):
     disliked_ingredients = Column(Text, nullable=True, comment="嫌いな食材（カンマ区切り）")
     preference_trend = Column(Text, nullable=True, comment="好みの傾向")
 
+    # お気に入りレシピ（user_recipes を経由した1回のJOINで取得する読み取り専用リレーション）
+    favorite_recipes = relationship(
+        "Recipe",
+        secondary="user_recipes",
+        primaryjoin="and_(Users.id == UserRecipe.user_id, UserRecipe.is_favorite.is_(True))",
+        secondaryjoin="UserRecipe.recipe_id == Recipe.id",
+        viewonly=True,
+        lazy="select",
+    )
+
     @property
     def display_name(self):
         """表示用の名前を返す"""
@@ -78,8 +89,3 @@ class Users(Base):
     def is_oauth_user(self):
         """OAuthユーザーかどうかを判定"""
         return bool(self.oauth_provider and self.oauth_id)
-    
-    @property
-    def favorite_recipes(self):
-        """ユーザーのお気に入りレシピを取得"""
-        return [user_recipe.recipe for user_recipe in self.user_recipes if user_recipe.is_favorite]
\ No newline at end of file
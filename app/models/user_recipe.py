@@ -1,4 +1,5 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, Text
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, Text
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.db.base_class import Base
@@ -21,7 +22,12 @@ class UserRecipe(Base):
     
     # リレーションシップ
     # user = relationship("Users", back_populates="user_recipes")
-    # recipe = relationship("Recipe", back_populates="user_recipes")
+    recipe = relationship("Recipe", back_populates="user_recipes")
+    
+    __table_args__ = (
+        # ユーザー単位のレシピ一覧（user_id で絞り込み recipe_id で結合）を索引だけで解決する
+        Index("ix_user_recipes_user_id_recipe_id", "user_id", "recipe_id"),
+    )
     
     def __repr__(self):
         return f"<UserRecipe(id={self.id}, user_id={self.user_id}, recipe_id={self.recipe_id})>"
\ No newline at end of file
@@ -68,6 +68,14 @@ class SessionHistoryDocument(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class SessionHistoryMeta(BaseModel):
+    """セッション履歴の一覧用メタデータ（メッセージ本体は含まない）"""
+    session_id: str
+    user_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    message_count: int = 0
+
 # WebSocket用のスキーマ
 class WebSocketMessage(BaseModel):
     """WebSocketメッセージ用スキーマ"""
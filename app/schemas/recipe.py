@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 # ---------------
@@ -28,8 +28,7 @@ class ExternalService(ExternalServiceBase):
     created_date: datetime
     updated_date: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ---------------
@@ -56,8 +55,7 @@ class RecipeStatus(RecipeStatusBase):
     created_date: datetime
     updated_date: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ---------------
@@ -79,9 +77,13 @@ class IngredientUpdate(BaseModel):
     """材料更新スキーマ"""
     ingredient: Optional[str] = Field(None, description="材料名")
     amount: Optional[str] = Field(None, description="量（単位付き）")
-    updated_date: Optional[datetime] = datetime.utcnow()
+    updated_date: datetime = Field(default_factory=datetime.utcnow)
 
 
+class IngredientBulkUpdate(IngredientUpdate):
+    """材料一括更新スキーマ（1件分）"""
+    id: int = Field(..., description="材料ID")
+
 
 class Ingredient(IngredientBase):
     """材料応答スキーマ"""
@@ -90,8 +92,7 @@ class Ingredient(IngredientBase):
     created_date: datetime
     updated_date: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ---------------
@@ -105,8 +106,8 @@ class ProcessBase(BaseModel):
 
 class ProcessCreate(ProcessBase):
     """調理工程作成スキーマ"""
-    created_date: Optional[datetime] = datetime.utcnow()
-    updated_date: Optional[datetime] = datetime.utcnow()
+    created_date: datetime = Field(default_factory=datetime.utcnow)
+    updated_date: datetime = Field(default_factory=datetime.utcnow)
 
 
 class ProcessUpdate(BaseModel):
@@ -115,6 +116,11 @@ class ProcessUpdate(BaseModel):
     process: Optional[str] = Field(None, description="手順")
 
 
+class ProcessBulkUpdate(ProcessUpdate):
+    """調理工程一括更新スキーマ（1件分）"""
+    id: int = Field(..., description="調理工程ID")
+
+
 class Process(ProcessBase):
     """調理工程応答スキーマ"""
     id: int
@@ -122,8 +128,7 @@ class Process(ProcessBase):
     created_date: datetime
     updated_date: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ---------------
@@ -142,8 +147,8 @@ class RecipeCreate(RecipeBase):
     """レシピ作成スキーマ"""
     status_id: int = Field(1, description="ステータスID（デフォルトは「生成前」）")
     external_service_id: Optional[int] = Field(None, description="抽出元サービスID")
-    created_date: Optional[datetime] = datetime.utcnow()
-    updated_date: Optional[datetime] = datetime.utcnow()
+    created_date: datetime = Field(default_factory=datetime.utcnow)
+    updated_date: datetime = Field(default_factory=datetime.utcnow)
 
 
 class RecipeUpdate(BaseModel):
@@ -162,8 +167,7 @@ class RecipeInDBBase(RecipeBase):
     created_date: datetime
     updated_date: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Recipe(RecipeInDBBase):
@@ -181,8 +185,7 @@ class RecipeDetail(Recipe):
     ingredients: List[Ingredient] = []
     processes: List[Process] = []
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ---------------
@@ -216,7 +219,7 @@ class UserRecipeUpdate(BaseModel):
     is_favorite: Optional[bool] = Field(None, description="お気に入りフラグ")
     note: Optional[str] = Field(None, description="ユーザーのメモ")
     rating: Optional[int] = Field(None, ge=1, le=5, description="ユーザー評価（1〜5）")
-    updated_date: Optional[datetime] = datetime.utcnow()
+    updated_date: datetime = Field(default_factory=datetime.utcnow)
 
 
 class UserRecipe(UserRecipeBase):
@@ -225,8 +228,7 @@ class UserRecipe(UserRecipeBase):
     created_date: datetime
     updated_date: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ---------------
@@ -246,9 +248,15 @@ class RecipeFilter(BaseModel):
 # ---------------
 # レシピ一覧用の応答スキーマ
 # ---------------
+class RecipeListItem(Recipe):
+    """レシピ一覧の1件分（レシピ情報とユーザーごとのお気に入り・評価）"""
+    is_favorite: Optional[bool] = False
+    rating: Optional[int] = None
+
+
 class RecipeList(BaseModel):
     """レシピ一覧応答スキーマ"""
-    items: List[Recipe]
+    items: List[RecipeListItem]
     total: int
     page: int
     per_page: int
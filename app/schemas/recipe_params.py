@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class RecipeParameters(BaseModel):
@@ -14,12 +14,8 @@ class RecipeParameters(BaseModel):
     spiciness: Optional[int] = Field(None, ge=1, le=5, description="辛味の強さ (1-5)")
     disliked_ingredients: Optional[List[str]] = Field(None, alias="dislikedIngredients", description="嫌いな食材のリスト")
 
-    class Config:
-        allow_population_by_field_name = True
-        json_encoders = {
-            # 必要に応じてカスタムエンコーダーを追加
-        }
+    model_config = ConfigDict(populate_by_name=True)
 
     def to_dict(self) -> dict:
         """辞書形式で返す（Noneの値は除外）"""
-        return {k: v for k, v in self.dict(by_alias=True, exclude_none=True).items()}
+        return {k: v for k, v in self.model_dump(by_alias=True, exclude_none=True).items()}
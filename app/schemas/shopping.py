@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 # ---------------
@@ -13,13 +13,13 @@ class ShoppingBase(BaseModel):
 
 class ShoppingCreate(ShoppingBase):
     """ショッピングリスト作成スキーマ"""
-    created_date: Optional[datetime] = datetime.utcnow()
-    updated_date: Optional[datetime] = datetime.utcnow()
+    created_date: datetime = Field(default_factory=datetime.utcnow)
+    updated_date: datetime = Field(default_factory=datetime.utcnow)
 
 class ShoppingUpdate(BaseModel):
     """ショッピングリスト更新スキーマ"""
     list_name: Optional[str] = Field(None, description="リスト名")
-    updated_date: Optional[datetime] = datetime.utcnow()
+    updated_date: datetime = Field(default_factory=datetime.utcnow)
 
 class Shopping(ShoppingBase):
     """ショッピングリスト応答スキーマ"""
@@ -28,8 +28,7 @@ class Shopping(ShoppingBase):
     created_date: datetime
     updated_date: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # ---------------
 # UserShopping スキーマ
@@ -42,13 +41,13 @@ class UserShoppingBase(BaseModel):
 
 class UserShoppingCreate(UserShoppingBase):
     """ユーザーショッピング作成スキーマ"""
-    created_date: Optional[datetime] = datetime.utcnow()
-    updated_date: Optional[datetime] = datetime.utcnow()
+    created_date: datetime = Field(default_factory=datetime.utcnow)
+    updated_date: datetime = Field(default_factory=datetime.utcnow)
 
 class UserShoppingUpdate(BaseModel):
     """ユーザーショッピング更新スキーマ"""
     is_favorite: Optional[bool] = Field(None, description="お気に入りフラグ")
-    updated_date: Optional[datetime] = datetime.utcnow()
+    updated_date: datetime = Field(default_factory=datetime.utcnow)
 
 class UserShopping(UserShoppingBase):
     """ユーザーショッピング応答スキーマ"""
@@ -56,8 +55,7 @@ class UserShopping(UserShoppingBase):
     created_date: datetime
     updated_date: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # ---------------
@@ -72,15 +70,15 @@ class ShoppingItemBase(BaseModel):
 
 class ShoppingItemCreate(ShoppingItemBase):
     """ショッピングアイテム作成スキーマ"""
-    created_date: Optional[datetime] = datetime.utcnow()
-    updated_date: Optional[datetime] = datetime.utcnow()
+    created_date: datetime = Field(default_factory=datetime.utcnow)
+    updated_date: datetime = Field(default_factory=datetime.utcnow)
 
 class ShoppingItemUpdate(BaseModel):
     """ショッピングアイテム更新スキーマ"""
     ingredient: Optional[str] = Field(None, description="材料名")
     amount: Optional[str] = Field(None, description="量（単位付き）")
     is_checked: Optional[bool] = Field(None, description="購入済みフラグ")
-    updated_date: Optional[datetime] = datetime.utcnow()
+    updated_date: datetime = Field(default_factory=datetime.utcnow)
 
 class ShoppingItem(ShoppingItemBase):
     """ショッピングアイテム応答スキーマ"""
@@ -89,14 +87,15 @@ class ShoppingItem(ShoppingItemBase):
     created_date: datetime
     updated_date: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # ---------------
 # ShoppingList詳細スキーマ
 # ---------------
 
 class ShoppingList(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     items: List[Shopping]
     total: int
     page: int
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr, computed_field
+from pydantic import BaseModel, ConfigDict, EmailStr, computed_field
 
 
 class UserBase(BaseModel):
@@ -66,8 +66,7 @@ class UserInDBBase(UserBase):
     disliked_ingredients: Optional[str]
     preference_trend: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class User(UserInDBBase):
@@ -93,8 +92,7 @@ class UserMe(BaseModel):
     disliked_ingredients: Optional[str]
     preference_trend: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
     
     @computed_field
     @property
@@ -110,6 +108,8 @@ class UserMe(BaseModel):
 
 class Token(BaseModel):
     """アクセストークンスキーマ"""
+    model_config = ConfigDict(frozen=True)
+
     access_token: str
     token_type: str = "bearer"
     expires_in: int
@@ -118,5 +118,7 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     """トークンペイロードスキーマ"""
+    model_config = ConfigDict(frozen=True)
+
     sub: Optional[int] = None  # subject (user id)
     exp: Optional[int] = None
\ No newline at end of file
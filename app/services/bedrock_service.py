@@ -1,4 +1,6 @@
+import asyncio
 import logging
+from functools import lru_cache
 
 from app.core.aws.bedrock_client import BedrockClient
 from app.core.llm.chain.voice_recognition_chain import VoiceRecognitionChain
@@ -6,12 +8,19 @@ from app.schemas.base import VoiceRecognitionOutput
 
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=4)
+def _get_chain(bedrock_client: BedrockClient) -> VoiceRecognitionChain:
+    """クライアントごとに音声認識チェーンを一度だけ構築して使い回す"""
+    return VoiceRecognitionChain(chat_llm=bedrock_client.get_client())
+
+
 class BedrockService:
     """Amazon Bedrockサービスを利用するためのクラス"""
 
     def __init__(self, bedrock_client: BedrockClient):
         self.bedrock_client = bedrock_client.get_client()
-        self.chain = VoiceRecognitionChain(chat_llm=self.bedrock_client)
+        self.chain = _get_chain(bedrock_client)
 
     async def invoke(self, input: str, **kwargs) -> VoiceRecognitionOutput:
         """音声認識チェーンを呼び出して応答を得る
@@ -24,8 +33,9 @@ class BedrockService:
             チェーンの応答
         """
         try:
-            response = self.chain.invoke(input, **kwargs)
+            # チェーンの呼び出しは同期I/O（Bedrock API）なのでスレッドで実行しイベントループを塞がない
+            response = await asyncio.to_thread(self.chain.invoke, input, **kwargs)
             return VoiceRecognitionOutput(**response)
         except Exception as e:
-            logging.error(f"Error invoking Bedrock service: {str(e)}")
+            logger.error(f"Error invoking Bedrock service: {str(e)}")
             return VoiceRecognitionOutput(status="error", message=str(e))
@@ -1,10 +1,10 @@
 import logging
 import uuid
-from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.core.request_context import request_now
 from app.schemas.mongo import CookingHistoryDocument, SessionDocument
 
 logger = logging.getLogger(__name__)
@@ -16,33 +16,45 @@ class MongoDBCookingService:
         self.cooking_history_collection = mongodb["cooking_history"]
         self.cooking_sessions_collection = mongodb["cooking_sessions"]
 
+    @staticmethod
+    async def ensure_indexes(mongodb: AsyncIOMotorDatabase) -> None:
+        """検索に使うインデックスを作成（既に存在する場合は何もしない）"""
+        await mongodb["cooking_history"].create_index([("user_id", 1), ("recipe_id", 1)])
+        await mongodb["cooking_sessions"].create_index("session_id", unique=True)
+
     async def add_cooking_history(
         self, 
         user_id: int, 
         recipe_id: int, 
     ) -> CookingHistoryDocument:
         """料理履歴を追加"""
-        cooking_history_doc = CookingHistoryDocument(
-            user_id=user_id,
-            recipe_id=recipe_id,
-            created_at=datetime.utcnow()
-        )
+        doc = {
+            "user_id": user_id,
+            "recipe_id": recipe_id,
+            "created_at": request_now(),
+        }
         
-        result = await self.cooking_history_collection.insert_one(cooking_history_doc.dict(by_alias=True))
+        result = await self.cooking_history_collection.insert_one(doc)
         logger.info(f"Cooking history added with ID: {result.inserted_id}")
-        return cooking_history_doc
+        # 自前で組み立てた値なので再検証せずにモデル化する
+        return CookingHistoryDocument.model_construct(**doc)
     
     async def get_cooking_history(
         self, 
         user_id: int, 
         recipe_id: int
-    ) -> List[CookingHistoryDocument]:
-        """ユーザーの料理履歴を取得"""
+    ) -> List[Dict[str, Any]]:
+        """ユーザーの料理履歴を取得
+
+        応答でそのままJSON化するため、モデルを経由せずCookingHistoryDocumentと同じ形のdictで返す。
+        """
         logger.info(f"Fetching cooking history for user_id: {user_id}, recipe_id: {recipe_id}")
-        docs = await self.cooking_history_collection.find(
-            {"recipe_id": int(recipe_id), "user_id": user_id}
-        ).to_list(length=None)
-        return [CookingHistoryDocument(**doc) for doc in docs]
+        # 応答に使うフィールドだけを取得し、バッチ単位で受け取る
+        cursor = self.cooking_history_collection.find(
+            {"recipe_id": int(recipe_id), "user_id": user_id},
+            projection={"_id": 0, "user_id": 1, "recipe_id": 1, "created_at": 1},
+        ).batch_size(256)
+        return [doc async for doc in cursor]
 
     async def create_session(self, user_id: Optional[int] = None) -> SessionDocument:
         """新しいセッションを作成"""
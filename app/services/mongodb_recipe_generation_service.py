@@ -1,10 +1,27 @@
+import asyncio
+import logging
 import uuid
-from datetime import datetime
+from collections import defaultdict
 from typing import Any, Dict, List, Optional
 
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from motor.motor_asyncio import AsyncIOMotorCommandCursor, AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
-from app.schemas.mongo import CookingHistoryDocument, SessionDocument, SessionHistoryDocument, SessionHistoryMessage
+from app.core.request_context import request_now
+from app.schemas.mongo import SessionDocument, SessionHistoryDocument, SessionHistoryMessage
+
+logger = logging.getLogger(__name__)
+
+# 履歴メッセージの書き込みバッファ設定（件数か経過時間のどちらかに達したらまとめて書き込む）
+HISTORY_FLUSH_THRESHOLD = 100
+HISTORY_FLUSH_INTERVAL = 0.2  # 秒
+
+
+def _construct_history(doc: Dict[str, Any]) -> SessionHistoryDocument:
+    """DBから読み出した履歴ドキュメントを検証なしでモデルに組み立てる（信頼済みデータのため）"""
+    messages = [SessionHistoryMessage.model_construct(**m) for m in doc.get("messages", [])]
+    return SessionHistoryDocument.model_construct(**{**doc, "messages": messages})
 
 
 class MongoDBRecipeGenerationService:
@@ -13,6 +30,19 @@ class MongoDBRecipeGenerationService:
         self.mongodb = mongodb
         self.sessions_collection = mongodb["sessions"]
         self.history_collection = mongodb["session_history"]
+        # session_id -> 未書き込みのメッセージ
+        self._msg_buffer: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._buffered_count = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    @staticmethod
+    async def ensure_indexes(mongodb: AsyncIOMotorDatabase) -> None:
+        """検索に使うインデックスを作成（既に存在する場合は何もしない）"""
+        await mongodb["sessions"].create_index("session_id", unique=True)
+        await mongodb["sessions"].create_index([("user_id", 1), ("status", 1)])
+        await mongodb["session_history"].create_index("session_id", unique=True)
+        await mongodb["session_history"].create_index("user_id")
 
     async def create_session(self, user_id: Optional[int] = None) -> SessionDocument:
         """新しいセッションを作成"""
@@ -23,13 +53,13 @@ class MongoDBRecipeGenerationService:
             status="active"
         )
         
-        # sessionsコレクションに挿入
-        result = await self.sessions_collection.insert_one(session_doc.dict(by_alias=True))
-        session_doc.id = result.inserted_id
-        
-        # session_historyコレクションも初期化
+        # sessionsコレクションへの挿入とsession_historyコレクションの初期化を並行して行う
         history_doc = SessionHistoryDocument(session_id=session_id, user_id=user_id)
-        await self.history_collection.insert_one(history_doc.dict(by_alias=True))
+        result, _ = await asyncio.gather(
+            self.sessions_collection.insert_one(session_doc.dict(by_alias=True)),
+            self.history_collection.insert_one(history_doc.dict(by_alias=True)),
+        )
+        session_doc.id = result.inserted_id
         
         return session_doc
     
@@ -38,13 +68,41 @@ class MongoDBRecipeGenerationService:
         doc = await self.sessions_collection.find_one({"session_id": session_id})
         return SessionDocument(**doc) if doc else None
     
+    async def get_session_with_messages(self, session_id: str, limit: int = 500) -> Dict[str, Any]:
+        """セッションと直近limit件の履歴メッセージを1回の集計で取得
+
+        Returns:
+            {"session": SessionDocument | None, "messages": List[dict]}
+        """
+        await self.flush_now()
+        pipeline = [
+            {"$match": {"session_id": session_id}},
+            {"$limit": 1},
+            {
+                "$lookup": {
+                    "from": self.history_collection.name,
+                    "localField": "session_id",
+                    "foreignField": "session_id",
+                    "as": "history",
+                }
+            },
+            {"$set": {"messages": {"$slice": [{"$ifNull": [{"$arrayElemAt": ["$history.messages", 0]}, []]}, -limit]}}},
+            {"$unset": "history"},
+        ]
+        docs = await self.sessions_collection.aggregate(pipeline).to_list(length=1)
+        if not docs:
+            return {"session": None, "messages": []}
+
+        messages = docs[0].pop("messages")
+        return {"session": SessionDocument(**docs[0]), "messages": messages}
+
     async def update_session(
         self, 
         session_id: str, 
         update_data: Dict[str, Any]
     ) -> Optional[SessionDocument]:
         """セッションを更新"""
-        update_data["updated_at"] = datetime.utcnow()
+        update_data["updated_at"] = request_now()
         
         result = await self.sessions_collection.update_one(
             {"session_id": session_id},
@@ -63,7 +121,7 @@ class MongoDBRecipeGenerationService:
         """セッションステータスを更新"""
         update_data = {"status": status}
         if status in ["completed", "failed", "cancelled"]:
-            update_data["completed_at"] = datetime.utcnow()
+            update_data["completed_at"] = request_now()
         
         return await self.update_session(session_id, update_data)
     
@@ -74,47 +132,156 @@ class MongoDBRecipeGenerationService:
         content: str,
         metadata: Optional[Dict[str, Any]] = None
     ) -> str:
-        """セッション履歴にメッセージを追加"""
+        """セッション履歴にメッセージを追加
+
+        メッセージはバッファに積み、HISTORY_FLUSH_THRESHOLD件たまるか
+        HISTORY_FLUSH_INTERVAL秒経過した時点でまとめて書き込む。
+        書き込み済みであることが必要な場合は flush_now() を呼ぶこと。
+        """
         message_id = str(uuid.uuid4())
-        message = SessionHistoryMessage(
-            message_id=message_id,
-            message_type=message_type,
-            content=content,
-            metadata=metadata or {}
-        )
+        # SessionHistoryMessageと同じ形のdictを直接組み立てる（モデルの生成とdict変換を省く）
+        message = {
+            "message_id": message_id,
+            "message_type": message_type,
+            "content": content,
+            "metadata": metadata or {},
+            "timestamp": request_now(),
+        }
         
-        # session_historyコレクションにメッセージを追加
-        await self.history_collection.update_one(
-            {"session_id": session_id},
-            {
-                "$push": {"messages": message.dict()},
-                "$set": {"updated_at": datetime.utcnow()}
-            },
-            upsert=True  # ドキュメントが存在しない場合は作成
-        )
+        self._msg_buffer[session_id].append(message)
+        self._buffered_count += 1
+
+        if self._buffered_count >= HISTORY_FLUSH_THRESHOLD:
+            await self.flush_now()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
         
         return message_id
+
+    async def _flush_later(self) -> None:
+        """一定時間待ってからバッファを書き込む（失敗した場合はメッセージを残したまま再度予約する）"""
+        await asyncio.sleep(HISTORY_FLUSH_INTERVAL)
+        self._flush_task = None
+        try:
+            await self.flush_now()
+        except Exception as e:
+            logger.error(f"Failed to flush session history, retrying later: {str(e)}")
+            if self._flush_task is None and self._msg_buffer:
+                self._flush_task = asyncio.create_task(self._flush_later())
+
+    def _requeue(self, unwritten: Dict[str, List[Dict[str, Any]]]) -> None:
+        """書き込めなかったメッセージを、その後に追加されたメッセージより前に戻す"""
+        merged: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for session_id, messages in unwritten.items():
+            merged[session_id].extend(messages)
+        for session_id, messages in self._msg_buffer.items():
+            merged[session_id].extend(messages)
+        self._msg_buffer = merged
+        self._buffered_count += sum(len(messages) for messages in unwritten.values())
+
+    async def flush_now(self) -> None:
+        """バッファ済みのメッセージをセッションごとに1つの$pushへまとめ、1回のbulk_writeで書き込む
+
+        書き込みに失敗した場合は、書き込めなかったメッセージをバッファに戻してから例外を再送出する。
+        """
+        async with self._flush_lock:
+            if not self._msg_buffer:
+                return
+            buffer, self._msg_buffer = self._msg_buffer, defaultdict(list)
+            self._buffered_count = 0
+
+            now = request_now()
+            session_ids = list(buffer)
+            try:
+                await self.history_collection.bulk_write(
+                    [
+                        UpdateOne(
+                            {"session_id": session_id},
+                            {
+                                "$push": {"messages": {"$each": buffer[session_id]}},
+                                "$set": {"updated_at": now}
+                            },
+                            upsert=True  # ドキュメントが存在しない場合は作成
+                        )
+                        for session_id in session_ids
+                    ],
+                    ordered=False,
+                )
+            except BulkWriteError as e:
+                # ordered=Falseのため失敗した操作以外は書き込み済み。失敗したセッション分だけ戻す
+                failed = {session_ids[err["index"]] for err in e.details.get("writeErrors", [])}
+                self._requeue({session_id: buffer[session_id] for session_id in session_ids if session_id in failed})
+                raise
+            except Exception:
+                self._requeue(buffer)
+                raise
     
     async def get_session_history(self, session_id: str) -> Optional[SessionHistoryDocument]:
         """セッション履歴を取得"""
+        await self.flush_now()
         doc = await self.history_collection.find_one({"session_id": session_id})
-        return SessionHistoryDocument(**doc) if doc else None
+        return _construct_history(doc) if doc else None
     
     async def get_user_session_history(
         self, 
         user_id: int,
-    ) -> List[SessionHistoryDocument]:
-        """ユーザーのセッション履歴をすべて取得"""
-        docs = await self.history_collection.find(
-            {"user_id": user_id}
-        ).to_list(length=None)
-        return [SessionHistoryDocument(**doc) for doc in docs]
+    ) -> List[Dict[str, Any]]:
+        """ユーザーのセッション履歴をすべて取得
+
+        応答でそのままJSON化するため、モデルを経由せずSessionHistoryDocumentと同じ形のdictで返す。
+        """
+        await self.flush_now()
+        # 履歴はメッセージ配列を含み大きくなるため、少数ずつ受け取る
+        cursor = self.history_collection.find({"user_id": user_id}).batch_size(20)
+        return [doc async for doc in cursor]
     
-    async def get_session_messages(self, session_id: str) -> List[SessionHistoryMessage]:
-        """セッションのメッセージリストを取得"""
-        history = await self.get_session_history(session_id)
-        return history.messages if history else []
+    async def list_user_sessions_meta(self, user_id: int) -> List[Dict[str, Any]]:
+        """ユーザーのセッション履歴をメタデータ（件数のみ、メッセージ本体なし）で新しい順に取得"""
+        await self.flush_now()
+        pipeline = [
+            {"$match": {"user_id": user_id}},
+            {
+                "$project": {
+                    "_id": 0,
+                    "session_id": 1,
+                    "user_id": 1,
+                    "created_at": 1,
+                    "updated_at": 1,
+                    "message_count": {"$size": {"$ifNull": ["$messages", []]}},
+                }
+            },
+            {"$sort": {"updated_at": -1}},
+        ]
+        return await self.history_collection.aggregate(pipeline).to_list(length=None)
+
+    async def get_session_messages(self, session_id: str, user_id: Optional[int] = None) -> List[SessionHistoryMessage]:
+        """セッションのメッセージリストを取得（メッセージ配列だけを読み出す）
+
+        user_idを指定した場合は、そのユーザーのセッションである場合のみ返す。
+        """
+        await self.flush_now()
+        query: Dict[str, Any] = {"session_id": session_id}
+        if user_id is not None:
+            query["user_id"] = user_id
+        doc = await self.history_collection.find_one(query, projection={"_id": 0, "messages": 1})
+        if not doc:
+            return []
+        return [SessionHistoryMessage.model_construct(**m) for m in doc.get("messages", [])]
     
+    def iter_session_messages(self, session_id: str, batch_size: int = 100) -> AsyncIOMotorCommandCursor:
+        """セッションのメッセージを古い順に1件ずつ返すカーソルを取得（履歴全体をメモリに載せない）
+
+        バッファ中のメッセージは含まれないため、必要なら事前に flush_now() を呼ぶこと。
+        """
+        return self.history_collection.aggregate(
+            [
+                {"$match": {"session_id": session_id}},
+                {"$unwind": "$messages"},
+                {"$replaceRoot": {"newRoot": "$messages"}},
+            ],
+            batchSize=batch_size,
+        )
+
     async def delete_session(self, session_id: str) -> bool:
         """セッションと履歴を削除"""
         # セッションを削除
@@ -137,34 +304,3 @@ class MongoDBRecipeGenerationService:
         # 一つのセッションを取得
         doc = await self.sessions_collection.find_one(query)
         return SessionDocument(**doc) if doc else None
-    
-class MongoDBCookingService:
-
-    def __init__(self, mongodb: AsyncIOMotorDatabase):
-        self.mongodb = mongodb
-        self.recipes_collection = mongodb["cooking_history"]
-
-    async def add_cooking_history(
-        self, 
-        user_id: int, 
-        recipe_id: str, 
-    ) -> CookingHistoryDocument:
-        """料理履歴を追加"""
-        history_id = str(uuid.uuid4())
-        cooking_history_doc = CookingHistoryDocument(
-            history_id=history_id,
-            user_id=user_id,
-            recipe_id=recipe_id,
-            created_at=datetime.utcnow()
-        )
-        
-        result = await self.recipes_collection.insert_one(cooking_history_doc)
-        return CookingHistoryDocument(**result.inserted_id, **cooking_history_doc.dict(by_alias=True))
-    
-    async def get_cooking_history(
-        self, 
-        user_id: int, 
-    ) -> List[CookingHistoryDocument]:
-        """ユーザーの料理履歴を取得"""
-        docs = await self.recipes_collection.find({"user_id": user_id}).to_list(length=None)
-        return [CookingHistoryDocument(**doc) for doc in docs]
@@ -1,25 +1,144 @@
+import asyncio
+import hashlib
 import logging
+import time
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy.orm import Session
+import orjson
+from redis import Redis
+from sqlalchemy import ARRAY, Integer, String, any_, bindparam, cast, column, delete, func, insert, literal_column, select, update, values
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.orm import Session, defer, joinedload, raiseload, selectinload
 
 from app.core.aws.bedrock_client import EmbeddingBedrockClient
 from app.core.config import settings
 from app.models.recipe import ExternalService, Ingredient, Process, Recipe, RecipeStatus
 from app.models.user_recipe import UserRecipe
-from app.schemas.recipe import IngredientUpdate, ProcessUpdate, RecipeList
+from app.schemas.recipe import IngredientBulkUpdate, IngredientUpdate, ProcessBulkUpdate, ProcessUpdate, RecipeCreate, RecipeList
 
 logger = logging.getLogger(__name__)
 
+# 参照テーブル（外部サービス・レシピステータス）のキャッシュ保持秒数
+REFERENCE_CACHE_TTL = 600
+
+# テーブル名 -> (有効期限のmonotonic時刻, 全行)
+_reference_cache: Dict[str, Tuple[float, Tuple[Dict[str, Any], ...]]] = {}
+
+
+# レシピ一覧（RecipeListItem）で返すRecipeの列（埋め込みベクトルは含めない）
+_RECIPE_LIST_COLUMNS = (
+    Recipe.id,
+    Recipe.recipe_name,
+    Recipe.url,
+    Recipe.keyword,
+    Recipe.genrue,
+    Recipe.status_id,
+    Recipe.external_service_id,
+    Recipe.created_date,
+    Recipe.updated_date,
+)
+
+# レシピ一覧のキャッシュ保持秒数
+RECIPE_LIST_CACHE_TTL = 60
+
+
+def _recipe_list_tag_key(user_id: int) -> str:
+    """ユーザーごとのレシピ一覧キャッシュのキーを集めるSETのキー"""
+    return f"recipes:{user_id}:keys"
+
+
+def invalidate_reference_caches() -> None:
+    """参照テーブルのキャッシュを破棄（外部サービス・レシピステータスを更新した後に呼ぶ）"""
+    _reference_cache.clear()
+
+
+def _search_text():
+    """キーワード検索の対象文字列（ix_recipes_search_trgm インデックスの式と一致させること）"""
+    sep = literal_column("' '")
+    return Recipe.recipe_name.op("||")(sep).op("||")(func.coalesce(Recipe.keyword, "")).op("||")(sep).op("||")(func.coalesce(Recipe.genrue, ""))
+
+
 class RecipeService:
 
-    def __init__(self, db: Session):
+    # (sorted_by, order_by) -> ORDER BY句
+    _ORDER_MAP = {
+        ("created_date", "asc"): Recipe.created_date.asc(),
+        ("created_date", "desc"): Recipe.created_date.desc(),
+        ("updated_date", "asc"): Recipe.updated_date.asc(),
+        ("updated_date", "desc"): Recipe.updated_date.desc(),
+        ("recipe_name", "asc"): Recipe.recipe_name.asc(),
+        ("recipe_name", "desc"): Recipe.recipe_name.desc(),
+        ("rating", "asc"): UserRecipe.rating.asc(),
+        ("rating", "desc"): UserRecipe.rating.desc(),
+    }
+
+    def __init__(self, db: Session, cache: Optional[Redis] = None):
         self.db = db
+        # レシピ一覧のキャッシュ先（未指定の場合はキャッシュしない）
+        self.cache = cache
+        # (user_id, recipe_id) -> 取得済みのユーザーレシピ（サービスはリクエストごとに作られるため、リクエスト内でのみ有効）
+        self._user_recipe_cache: Dict[Tuple[int, int], UserRecipe] = {}
+
+    def _get_cached_recipe_list(self, key: str) -> Optional[RecipeList]:
+        """キャッシュ済みのレシピ一覧を取得（Redisに接続できない場合はキャッシュなしとして扱う）"""
+        if self.cache is None:
+            return None
+        try:
+            raw = self.cache.get(key)
+        except Exception as e:
+            logger.warning(f"Failed to read recipe list cache: {str(e)}")
+            return None
+        return RecipeList.model_validate_json(raw) if raw else None
 
-    def get_recipe_by_id(self, recipe_id: int, user_id: int) -> Recipe:
-        """指定されたIDのレシピを取得"""
-        result = self.db.query(Recipe).join(UserRecipe).filter(
+    def _set_cached_recipe_list(self, user_id: int, key: str, recipe_list: RecipeList) -> None:
+        """レシピ一覧をキャッシュし、ユーザーごとのキー集合に登録"""
+        if self.cache is None:
+            return
+        tag_key = _recipe_list_tag_key(user_id)
+        try:
+            pipe = self.cache.pipeline(transaction=False)
+            pipe.set(key, recipe_list.model_dump_json(), ex=RECIPE_LIST_CACHE_TTL)
+            pipe.sadd(tag_key, key)
+            pipe.expire(tag_key, RECIPE_LIST_CACHE_TTL)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to write recipe list cache: {str(e)}")
+
+    def invalidate_recipe_list_cache(self, *user_ids: int) -> None:
+        """指定ユーザーのレシピ一覧キャッシュをすべて破棄（KEYSを使わずキー集合から削除する）"""
+        if self.cache is None or not user_ids:
+            return
+        try:
+            tag_keys = [_recipe_list_tag_key(user_id) for user_id in set(user_ids)]
+            pipe = self.cache.pipeline(transaction=False)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            keys = [key for members in pipe.execute() for key in members]
+            self.cache.unlink(*keys, *tag_keys)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate recipe list cache: {str(e)}")
+
+    def get_recipe_by_id(
+        self,
+        recipe_id: int,
+        user_id: int,
+        with_ingredients: bool = False,
+        with_processes: bool = False
+    ) -> Recipe:
+        """指定されたIDのレシピを取得
+
+        with_ingredients/with_processesを指定すると、材料・調理手順をselectinloadで同時に読み込む
+        （複数のコレクションをjoinedloadすると行が掛け合わされるためselectinloadを使う）。
+        """
+        query = self.db.query(Recipe).options(defer(Recipe.embedding))
+        if with_ingredients:
+            query = query.options(selectinload(Recipe.ingredients))
+        if with_processes:
+            query = query.options(selectinload(Recipe.processes))
+        # 指定していないリレーションの遅延ロードはエラーにして、N+1クエリの混入を防ぐ
+        query = query.options(raiseload("*"))
+        result = query.join(UserRecipe).filter(
             Recipe.id == recipe_id,
             UserRecipe.user_id == user_id
         ).first()
@@ -28,6 +147,33 @@ class RecipeService:
             raise ValueError(f"Recipe with id {recipe_id} not found for user {user_id}")
         return result
     
+    def _with_details(self):
+        """ステータス・外部サービス・材料・手順をまとめて読み込むクエリを作成（N+1クエリ回避）"""
+        return self.db.query(Recipe).options(
+            defer(Recipe.embedding),
+            joinedload(Recipe.status),
+            joinedload(Recipe.external_service),
+            selectinload(Recipe.ingredients),
+            selectinload(Recipe.processes),
+        )
+
+    def get_recipe_with_details(self, recipe_id: int, user_id: int) -> Recipe:
+        """指定されたIDのレシピを関連情報（材料・手順・ステータス・外部サービス）込みで取得"""
+        result = self._with_details().join(UserRecipe).filter(
+            Recipe.id == recipe_id,
+            UserRecipe.user_id == user_id
+        ).first()
+
+        if result is None:
+            raise ValueError(f"Recipe with id {recipe_id} not found for user {user_id}")
+        return result
+
+    def get_recipes_with_details(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Recipe]:
+        """ユーザーのレシピ一覧を関連情報込みで取得"""
+        return self._with_details().join(UserRecipe).filter(
+            UserRecipe.user_id == user_id
+        ).offset(skip).limit(limit).all()
+
     # pagenation付きのレシピ一覧を取得
     def get_recipes(
         self,
@@ -40,8 +186,29 @@ class RecipeService:
         order_by: Optional[str] = None,
         embedding_client: Optional[EmbeddingBedrockClient] = None
     ) -> RecipeList:
-        """レシピの一覧を取得"""
-        query = self.db.query(Recipe).join(UserRecipe).filter(
+        """レシピの一覧を取得（条件ごとにRECIPE_LIST_CACHE_TTL秒キャッシュする）"""
+        params = {
+            "page": page,
+            "per_page": per_page,
+            "keyword": keyword,
+            "favorites_only": favorites_only,
+            "sorted_by": sorted_by,
+            "order_by": order_by,
+        }
+        cache_key = f"recipes:{user_id}:{hashlib.sha1(orjson.dumps(params, option=orjson.OPT_SORT_KEYS)).hexdigest()}"
+        cached = self._get_cached_recipe_list(cache_key)
+        if cached is not None:
+            return cached
+
+        # 埋め込みベクトル（1536次元）は応答に含めないので読み込まない
+        # 一覧に必要な列だけを取得し（ORMオブジェクトは作らない）、
+        # 総件数はウィンドウ関数で各行に付けて返し、COUNT用の2回目のクエリを省く
+        query = self.db.query(
+            *_RECIPE_LIST_COLUMNS,
+            UserRecipe.is_favorite,
+            UserRecipe.rating,
+            func.count().over().label("total"),
+        ).join(UserRecipe, UserRecipe.recipe_id == Recipe.id).filter(
             UserRecipe.user_id == user_id
         )
 
@@ -57,61 +224,75 @@ class RecipeService:
                     Recipe.embedding.op('<->')(keyword_vector) < 0.5
                 )
             else:
-                # キーワードによる部分一致検索
-                query = query.filter(
-                    (Recipe.recipe_name.ilike(f"%{keyword}%")) |
-                    (Recipe.keyword.ilike(f"%{keyword}%")) |
-                    (Recipe.genrue.ilike(f"%{keyword}%"))
-                )
+                # キーワードによる部分一致検索（料理名・キーワード・ジャンルを連結した式のトライグラムGINインデックスを使う）
+                query = query.filter(_search_text().ilike(f"%{keyword}%"))
 
             if favorites_only:
                 query = query.filter(UserRecipe.is_favorite.is_(True))
 
         # ソート条件の適用
-        if sorted_by and order_by:
-            if sorted_by == "created_date":
-                if order_by == "asc":
-                    query = query.order_by(Recipe.created_date.asc())
-                elif order_by == "desc":
-                    query = query.order_by(Recipe.created_date.desc())
-                query = query.order_by(Recipe.created_date.desc())
-            elif sorted_by == "updated_date":
-                if order_by == "asc":
-                    query = query.order_by(Recipe.updated_date.asc())
-                elif order_by == "desc":
-                    query = query.order_by(Recipe.updated_date.desc())
-            elif sorted_by == "recipe_name":
-                if order_by == "asc":
-                    query = query.order_by(Recipe.recipe_name.asc())
-                elif order_by == "desc":
-                    query = query.order_by(Recipe.recipe_name.desc())
-            elif sorted_by == "rating":
-                if order_by == "asc":
-                    query = query.order_by(UserRecipe.rating.asc())
-                elif order_by == "desc":
-                    query = query.order_by(UserRecipe.rating.desc())
-
-        total_count = query.count()
-        results = query.offset((page - 1) * per_page).limit(per_page).all()
+        order_clause = self._ORDER_MAP.get((sorted_by, order_by))
+        if order_clause is not None:
+            query = query.order_by(order_clause)
+
+        # ページ間で順序が揺れないよう主キー降順を最後のソートキーにする
+        query = query.order_by(Recipe.id.desc())
+
+        rows = query.offset((page - 1) * per_page).limit(per_page).all()
+        if rows:
+            total_count = rows[0].total
+        elif page > 1:
+            # 最終ページより後ろを指定された場合は行がないため、件数だけ別途数える
+            total_count = query.with_entities(Recipe.id).order_by(None).count()
+        else:
+            total_count = 0
+        results = [row._mapping for row in rows]
         pages = (total_count + per_page - 1) // per_page
 
-        return RecipeList(items=results, total=total_count, page=page, per_page=per_page, pages=pages)
+        recipe_list = RecipeList(items=results, total=total_count, page=page, per_page=per_page, pages=pages)
+        self._set_cached_recipe_list(user_id, cache_key, recipe_list)
+        return recipe_list
     
-    def get_external_services(self) -> List[ExternalService]:
-        """外部サービスの一覧を取得"""
-        return self.db.query(ExternalService).all()
+    def get_external_services(self) -> Tuple[Dict[str, Any], ...]:
+        """外部サービスの一覧を取得（プロセス内でREFERENCE_CACHE_TTL秒キャッシュする）"""
+        return self._get_reference_rows(ExternalService)
     
-    def get_recipe_statuses(self) -> List[RecipeStatus]:
-        """レシピステータスの一覧を取得"""
-        return self.db.query(RecipeStatus).all()
+    def get_recipe_statuses(self) -> Tuple[Dict[str, Any], ...]:
+        """レシピステータスの一覧を取得（プロセス内でREFERENCE_CACHE_TTL秒キャッシュする）"""
+        return self._get_reference_rows(RecipeStatus)
+
+    def _get_reference_rows(self, model) -> Tuple[Dict[str, Any], ...]:
+        """ほぼ更新されない参照テーブルの全行を取得
+
+        リクエストをまたいでセッションに紐づいたORMオブジェクトを共有しないよう、列の値だけをdictにして保持する。
+        """
+        key = model.__tablename__
+        cached = _reference_cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        columns = model.__table__.columns
+        rows = tuple(dict(row) for row in self.db.execute(select(*columns).order_by(model.id)).mappings())
+        _reference_cache[key] = (time.monotonic() + REFERENCE_CACHE_TTL, rows)
+        return rows
     
-    def get_ingredient_by_recipe_id(self, recipe_id: int) -> List[Ingredient]:
-        """指定されたレシピIDの材料を取得"""
-        return self.db.query(Ingredient).filter(Ingredient.recipe_id == recipe_id).all()
+    def get_ingredient_by_recipe_id(self, recipe_id: int) -> Sequence[RowMapping]:
+        """指定されたレシピIDの材料を取得
+
+        応答にそのまま変換するだけなので、ORMオブジェクトを作らず列の値をRowMappingで返す。
+        """
+        return self.db.execute(
+            select(*Ingredient.__table__.columns).where(Ingredient.recipe_id == recipe_id)
+        ).mappings().all()
     
-    def get_processes_by_recipe_id(self, recipe_id: int) -> List[Process]:
-        """指定されたレシピIDの調理手順を取得"""
-        return self.db.query(Process).filter(Process.recipe_id == recipe_id).all()
+    def get_processes_by_recipe_id(self, recipe_id: int) -> Sequence[RowMapping]:
+        """指定されたレシピIDの調理手順を手順番号順に取得
+
+        応答にそのまま変換するだけなので、ORMオブジェクトを作らず列の値をRowMappingで返す。
+        """
+        return self.db.execute(
+            select(*Process.__table__.columns).where(Process.recipe_id == recipe_id).order_by(Process.process_number)
+        ).mappings().all()
     
     async def create_recipe(self, recipe: Recipe) -> Recipe:
         """新しいレシピを作成"""
@@ -120,11 +301,46 @@ class RecipeService:
         self.db.refresh(recipe)
         return recipe
     
+    async def create_recipe_with_user_link(
+        self,
+        recipe: Recipe,
+        user_recipe_factory: Callable[[int], UserRecipe]
+    ) -> Tuple[Recipe, UserRecipe]:
+        """レシピとユーザーレシピを1つのトランザクション（1回のcommit）で作成
+
+        レシピをflushして採番されたIDでuser_recipe_factoryからユーザーレシピを作る。
+        commit後の再読み込み（refresh）を省くため、作成したオブジェクトはセッションから切り離して返す。
+        """
+        self.db.add(recipe)
+        self.db.flush()
+        user_recipe = user_recipe_factory(recipe.id)
+        self.db.add(user_recipe)
+        self.db.flush()
+        self.db.expunge(recipe)
+        self.db.expunge(user_recipe)
+        self.db.commit()
+        # キャッシュは同期Redisクライアントで破棄するため、イベントループをブロックしないようスレッドで実行する
+        await asyncio.to_thread(self.invalidate_recipe_list_cache, user_recipe.user_id)
+        return recipe, user_recipe
+
+    def create_recipes_bulk(self, recipes_in: List[RecipeCreate]) -> List[int]:
+        """レシピを一括で作成し、作成されたIDを入力順で返す（複数行INSERT ... RETURNING 1文で実行）"""
+        if not recipes_in:
+            return []
+
+        stmt = insert(Recipe).returning(Recipe.id, sort_by_parameter_order=True)
+        result = self.db.execute(stmt, [recipe.dict() for recipe in recipes_in])
+        ids = list(result.scalars())
+        self.db.commit()
+        return ids
+    
     async def create_user_recipe(self, user_recipe: UserRecipe) -> UserRecipe:
         """ユーザーレシピを作成"""
         self.db.add(user_recipe)
         self.db.commit()
         self.db.refresh(user_recipe)
+        # キャッシュは同期Redisクライアントで破棄するため、イベントループをブロックしないようスレッドで実行する
+        await asyncio.to_thread(self.invalidate_recipe_list_cache, user_recipe.user_id)
         return user_recipe
     
     def create_ingredient(self, recipe_id: int, ingredient: str, amount: str) -> Ingredient:
@@ -142,48 +358,95 @@ class RecipeService:
         return new_ingredient
     
     async def create_ingredients(self, ingredients: List[Ingredient]) -> List[Ingredient]:
-        """材料を一括で作成"""
-        self.db.add_all(ingredients)
+        """材料を一括で作成（複数行INSERT ... RETURNING 1文で作成し、行ごとのrefreshを行わない）"""
+        if not ingredients:
+            return []
+
+        stmt = insert(Ingredient).returning(Ingredient, sort_by_parameter_order=True)
+        created = self.db.scalars(
+            stmt,
+            [{"recipe_id": i.recipe_id, "ingredient": i.ingredient, "amount": i.amount} for i in ingredients],
+        ).all()
+        # commit時の失効で属性アクセスごとにSELECTが走らないよう、RETURNINGで得た値を保持したままセッションから切り離す
+        for obj in created:
+            self.db.expunge(obj)
         self.db.commit()
-        for ingredient in ingredients:
-            self.db.refresh(ingredient)
-        return ingredients
+        return created
     
     async def create_processes(self, processes: List[Process]) -> List[Process]:
-        """調理手順を一括で作成"""
-        self.db.add_all(processes)
+        """調理手順を一括で作成（複数行INSERT ... RETURNING 1文で作成し、行ごとのrefreshを行わない）"""
+        if not processes:
+            return []
+
+        stmt = insert(Process).returning(Process, sort_by_parameter_order=True)
+        created = self.db.scalars(
+            stmt,
+            [{"recipe_id": p.recipe_id, "process_number": p.process_number, "process": p.process} for p in processes],
+        ).all()
+        # commit時の失効で属性アクセスごとにSELECTが走らないよう、RETURNINGで得た値を保持したままセッションから切り離す
+        for obj in created:
+            self.db.expunge(obj)
         self.db.commit()
-        for process in processes:
-            self.db.refresh(process)
-        return processes
+        return created
     
     def update_recipe(self, recipe:Recipe) -> Recipe:
         """既存のレシピを更新"""
         self.db.merge(recipe)
         self.db.commit()
         self.db.refresh(recipe)
+        # レシピを一覧に持つすべてのユーザーのキャッシュを破棄
+        user_ids = self.db.scalars(select(UserRecipe.user_id).where(UserRecipe.recipe_id == recipe.id)).all()
+        self.invalidate_recipe_list_cache(*user_ids)
         return recipe
     
     def update_ingredients(self, ingredient_id, ingredients: IngredientUpdate) -> Ingredient:
-        """材料を一括で更新"""
-        existing_ingredient = self.db.query(Ingredient).filter(Ingredient.id == ingredient_id).first()
-        if existing_ingredient is None:
+        """材料を更新（存在確認のSELECTを行わず、UPDATE ... RETURNING 1文で更新する）"""
+        updated = self._update_returning_one(
+            update(Ingredient).where(Ingredient.id == ingredient_id).values(
+                ingredient=ingredients.ingredient,
+                amount=ingredients.amount,
+                updated_date=datetime.utcnow(),
+            ).returning(Ingredient)
+        )
+        if updated is None:
             raise ValueError(f"Ingredient with id {ingredient_id} not found")
-        # 更新するフィールドを設定
-        existing_ingredient.ingredient = ingredients.ingredient
-        existing_ingredient.amount = ingredients.amount
-        existing_ingredient.updated_date = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(existing_ingredient)
-        return existing_ingredient
+        return updated
     
+    def bulk_update_ingredients(self, updates: List[IngredientBulkUpdate]) -> List[Ingredient]:
+        """複数の材料をUPDATE ... FROM (VALUES ...) 1文で更新
+
+        存在しないIDが含まれる場合は何も更新せずValueErrorを送出する。
+        """
+        if not updates:
+            return []
+
+        rows = values(
+            column("id", Integer), column("ingredient", String), column("amount", String), name="v"
+        ).data([(u.id, u.ingredient, u.amount) for u in updates])
+        stmt = (
+            update(Ingredient)
+            .where(Ingredient.id == rows.c.id)
+            .values(ingredient=rows.c.ingredient, amount=rows.c.amount, updated_date=datetime.utcnow())
+            .returning(Ingredient)
+            .execution_options(synchronize_session=False)
+        )
+        updated = self.db.scalars(stmt).all()
+        self._check_bulk_updated("Ingredient", updates, updated)
+        for obj in updated:
+            self.db.expunge(obj)
+        self.db.commit()
+        return updated
+
+    def _check_bulk_updated(self, name: str, updates, updated) -> None:
+        """一括更新で更新されなかったIDがあればロールバックしてValueErrorを送出"""
+        missing = {u.id for u in updates} - {obj.id for obj in updated}
+        if missing:
+            self.db.rollback()
+            raise ValueError(f"{name} with ids {sorted(missing)} not found")
+
     def delete_ingredient(self, ingredient_id: int) -> bool:
         """指定されたIDの材料を削除"""
-        ingredient = self.db.query(Ingredient).filter(Ingredient.id == ingredient_id).first()
-        if ingredient is None:
-            raise ValueError(f"Ingredient with id {ingredient_id} not found")
-        self.db.delete(ingredient)
-        self.db.commit()
+        self._delete_one(delete(Ingredient).where(Ingredient.id == ingredient_id), f"Ingredient with id {ingredient_id} not found")
         return True
     
     def create_process(self, recipe_id: int, process_number: int, process: str) -> Process:
@@ -201,37 +464,84 @@ class RecipeService:
         return new_process
     
     def update_process(self, process_id: int, process: ProcessUpdate) -> Process:
-        """調理手順を更新"""
-        existing_process = self.db.query(Process).filter(Process.id == process_id).first()
-        if existing_process is None:
-            raise ValueError(f"Process with id {process_id} not found")
+        """調理手順を更新（存在確認のSELECTを行わず、UPDATE ... RETURNING 1文で更新する）"""
         # 更新するフィールドを設定
+        update_data = {"updated_date": datetime.utcnow()}
         if process.process_number is not None:
-            existing_process.process_number = process.process_number
+            update_data["process_number"] = process.process_number
         if process.process is not None:
-            existing_process.process = process.process
-        existing_process.updated_date = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(existing_process)
-        return existing_process
+            update_data["process"] = process.process
+        updated = self._update_returning_one(
+            update(Process).where(Process.id == process_id).values(**update_data).returning(Process)
+        )
+        if updated is None:
+            raise ValueError(f"Process with id {process_id} not found")
+        return updated
     
+    def bulk_update_processes(self, updates: List[ProcessBulkUpdate]) -> List[Process]:
+        """複数の調理手順をUPDATE ... FROM (VALUES ...) 1文で更新（Noneの項目は変更しない）
+
+        存在しないIDが含まれる場合は何も更新せずValueErrorを送出する。
+        """
+        if not updates:
+            return []
+
+        rows = values(
+            column("id", Integer), column("process_number", Integer), column("process", String), name="v"
+        ).data([(u.id, u.process_number, u.process) for u in updates])
+        stmt = (
+            update(Process)
+            .where(Process.id == rows.c.id)
+            .values(
+                process_number=func.coalesce(cast(rows.c.process_number, Integer), Process.process_number),
+                process=func.coalesce(rows.c.process, Process.process),
+                updated_date=datetime.utcnow(),
+            )
+            .returning(Process)
+            .execution_options(synchronize_session=False)
+        )
+        updated = self.db.scalars(stmt).all()
+        self._check_bulk_updated("Process", updates, updated)
+        for obj in updated:
+            self.db.expunge(obj)
+        self.db.commit()
+        return updated
+
     def delete_process(self, process_id: int) -> bool:
         """指定されたIDの調理手順を削除"""
-        process = self.db.query(Process).filter(Process.id == process_id).first()
-        if process is None:
-            raise ValueError(f"Process with id {process_id} not found")
-        self.db.delete(process)
-        self.db.commit()
+        self._delete_one(delete(Process).where(Process.id == process_id), f"Process with id {process_id} not found")
         return True
 
+    def _update_returning_one(self, stmt):
+        """UPDATE ... RETURNING を実行してコミットし、更新後の行（該当なしの場合はNone）を返す
+
+        commit時の失効で再読み込みのSELECTが走らないよう、返す前にセッションから切り離す。
+        """
+        updated = self.db.scalars(stmt.execution_options(synchronize_session=False, populate_existing=True)).first()
+        if updated is not None:
+            self.db.expunge(updated)
+        self.db.commit()
+        return updated
+
+    def _delete_one(self, stmt, not_found_message: str) -> None:
+        """DELETEを実行してコミットし、削除対象がなければValueErrorを送出"""
+        result = self.db.execute(stmt.execution_options(synchronize_session=False))
+        self.db.commit()
+        if result.rowcount == 0:
+            raise ValueError(not_found_message)
+
     def get_user_recipe(self, user_id: int, recipe_id: int) -> UserRecipe:
-        """ユーザーレシピを取得"""
-        user_recipe = self.db.query(UserRecipe).filter(
-            UserRecipe.user_id == user_id,
-            UserRecipe.recipe_id == recipe_id
-        ).first()
+        """ユーザーレシピを取得（同じリクエスト内で取得済みのものは再検索しない）"""
+        key = (user_id, recipe_id)
+        user_recipe = self._user_recipe_cache.get(key)
         if user_recipe is None:
-            raise ValueError(f"UserRecipe with user_id {user_id} and recipe_id {recipe_id} not found")
+            user_recipe = self.db.query(UserRecipe).filter(
+                UserRecipe.user_id == user_id,
+                UserRecipe.recipe_id == recipe_id
+            ).first()
+            if user_recipe is None:
+                raise ValueError(f"UserRecipe with user_id {user_id} and recipe_id {recipe_id} not found")
+            self._user_recipe_cache[key] = user_recipe
         return user_recipe
     
     def get_user_recipes(self, user_id: int) -> List[UserRecipe]:
@@ -243,50 +553,46 @@ class RecipeService:
         if not recipe_ids:
             return []
 
+        # IN (...) はID数だけバインドパラメータが増えるため、配列1つを = ANY(:recipe_ids) で渡す
+        # （件数によらず同じSQL文になり、パラメータ数の上限にも当たらない）
+        ids = sorted(set(recipe_ids))
         return self.db.query(UserRecipe).filter(
             UserRecipe.user_id == user_id,
-            UserRecipe.recipe_id.in_(recipe_ids)
+            UserRecipe.recipe_id == any_(bindparam("recipe_ids", ids, type_=ARRAY(Integer)))
         ).all()
     
-    def get_user_recipe_by_id(self, user_id: int, recipe_id: int) -> UserRecipe:
-        """ユーザーレシピをIDで取得"""
-        user_recipe = self.db.query(UserRecipe).filter(
-            UserRecipe.user_id == user_id,
-            UserRecipe.recipe_id == recipe_id
-        ).first()
-        if user_recipe is None:
-            raise ValueError(f"UserRecipe with user_id {user_id} and recipe_id {recipe_id} not found")
-        return user_recipe
-    
     def update_user_recipe(self, user_id: int, recipe_id: int, is_favorite: bool, note: str, rating: int) -> UserRecipe:
-        """ユーザーレシピを更新"""
-        db_user_recipe = self.db.query(UserRecipe).filter(
-            UserRecipe.user_id == user_id,
-            UserRecipe.recipe_id == recipe_id
-        ).first()
-        if db_user_recipe is None:
-            raise ValueError(f"UserRecipe with user_id {user_id} and recipe_id {recipe_id} not found")
+        """ユーザーレシピを更新（存在確認のSELECTを行わず、UPDATE ... RETURNING 1文で更新する）"""
+        update_data = {"updated_date": datetime.utcnow()}
         if is_favorite is not None:
-            db_user_recipe.is_favorite = is_favorite
+            update_data["is_favorite"] = is_favorite
         if note is not None:
-            db_user_recipe.note = note
+            update_data["note"] = note
         if rating is not None:
             if rating < 1 or rating > 5:
                 raise ValueError("Rating must be between 1 and 5")
-            db_user_recipe.rating = rating
-        db_user_recipe.updated_date = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(db_user_recipe)
+            update_data["rating"] = rating
+        db_user_recipe = self._update_returning_one(
+            update(UserRecipe).where(
+                UserRecipe.user_id == user_id,
+                UserRecipe.recipe_id == recipe_id
+            ).values(**update_data).returning(UserRecipe)
+        )
+        self._user_recipe_cache.pop((user_id, recipe_id), None)
+        if db_user_recipe is None:
+            raise ValueError(f"UserRecipe with user_id {user_id} and recipe_id {recipe_id} not found")
+        self.invalidate_recipe_list_cache(user_id)
         return db_user_recipe
     
     def delete_user_recipe(self, user_id: int, recipe_id: int) -> bool:
         """ユーザーレシピを削除"""
-        db_user_recipe = self.db.query(UserRecipe).filter(
-            UserRecipe.user_id == user_id,
-            UserRecipe.recipe_id == recipe_id
-        ).first()
-        if db_user_recipe is None:
-            raise ValueError(f"UserRecipe with user_id {user_id} and recipe_id {recipe_id} not found")
-        self.db.delete(db_user_recipe)
-        self.db.commit()
+        self._user_recipe_cache.pop((user_id, recipe_id), None)
+        self._delete_one(
+            delete(UserRecipe).where(
+                UserRecipe.user_id == user_id,
+                UserRecipe.recipe_id == recipe_id
+            ),
+            f"UserRecipe with user_id {user_id} and recipe_id {recipe_id} not found"
+        )
+        self.invalidate_recipe_list_cache(user_id)
         return True
\ No newline at end of file
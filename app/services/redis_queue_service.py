@@ -1,8 +1,10 @@
-import json
+import asyncio
 import logging
+import time
 from datetime import datetime
 from typing import Any, Dict, Optional
 
+import orjson
 from celery import Celery
 from celery.result import AsyncResult
 from redis.asyncio import Redis
@@ -11,6 +13,41 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Task data lives for this many seconds
+TASK_TTL = 3600
+
+# Sorted set of task IDs scored by their expiry timestamp, used by cleanup_expired_tasks
+TASK_EXPIRY_ZSET = "tasks:by_expiry"
+
+# Sampled queue length is shared through this key for QUEUE_LENGTH_TTL seconds
+QUEUE_LENGTH_KEY = "queue:length"
+QUEUE_LENGTH_LOCK_KEY = "queue:length:lock"
+QUEUE_LENGTH_TTL = 5
+
+# Celery task state -> task status stored in Redis
+_CELERY_STATUS_MAP = {
+    "PENDING": "queued",
+    "STARTED": "processing",
+    "SUCCESS": "completed",
+    "FAILURE": "failed",
+    "RETRY": "retrying",
+    "REVOKED": "cancelled",
+}
+
+
+# Celery client shared by every RedisQueueService instance
+_CELERY_APP = Celery("bae-recipe-client", broker=f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0", backend=f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0")
+_CELERY_APP.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    result_serializer="json",
+    timezone="UTC",
+    enable_utc=True,
+    result_expires=3600,
+    broker_pool_limit=10,
+    task_always_eager=False,
+)
+
 
 class RedisQueueService:
     """Redis-based queue service using Celery for recipe generation tasks"""
@@ -19,18 +56,8 @@ class RedisQueueService:
         self.redis_client = redis_client
         self.queue_name = "recipe_gen_queue"
 
-        # Initialize Celery client
-        self.celery_app = Celery("bae-recipe-client", broker=f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0", backend=f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0")
-
-        # Configure Celery
-        self.celery_app.conf.update(
-            task_serializer="json",
-            accept_content=["json"],
-            result_serializer="json",
-            timezone="UTC",
-            enable_utc=True,
-            result_expires=3600,
-        )
+        # Shared module-level Celery client (creating one per request rebuilds its config and broker pool)
+        self.celery_app = _CELERY_APP
 
     async def enqueue_recipe_generation_task(self, session_id: str, url: str, user_id: int, recipe_params: Optional[dict] = None, priority: int = 1) -> str:
         """Send recipe generation task to Celery queue"""
@@ -64,10 +91,11 @@ class RedisQueueService:
                 "celery_task_id": celery_result.id,
             }
 
-            # Convert values to strings for Redis storage
-            redis_data = {k: str(v) for k, v in task_data.items()}
-            await self.redis_client.hset(task_key, mapping=redis_data)
-            await self.redis_client.expire(task_key, 3600)  # Expire in 1 hour
+            # Store the task data as a single JSON value with its TTL, plus the expiry index entry, in one round-trip
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.set(task_key, orjson.dumps(task_data), ex=TASK_TTL)
+                pipe.zadd(TASK_EXPIRY_ZSET, {celery_result.id: time.time() + TASK_TTL})
+                await pipe.execute()
 
             logger.info(f"Task enqueued: {celery_result.id} for session: {session_id}")
             return celery_result.id
@@ -79,26 +107,28 @@ class RedisQueueService:
     async def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get task status from both Redis and Celery"""
         try:
-            # Get task data from Redis
-            task_key = f"task:{task_id}"
-            redis_data = await self.redis_client.hgetall(task_key)
+            # Get Celery task status first so the Redis read and status update can share one round-trip
+            celery_result = AsyncResult(task_id, app=self.celery_app)
+            celery_status = celery_result.status
+            celery_result_data = celery_result.result
+
+            status = _CELERY_STATUS_MAP.get(celery_status)
+            error = str(celery_result_data) if celery_status == "FAILURE" else None
+
+            # Update Redis with latest status and read back the task data
+            redis_data = await self._update_redis_fields(task_id, status, error)
 
             if not redis_data:
                 logger.warning(f"Task not found in Redis: {task_id}")
                 return None
 
-            # Get Celery task status
-            celery_result = AsyncResult(task_id, app=self.celery_app)
-            celery_status = celery_result.status
-            celery_result_data = celery_result.result
-
             # Prepare response data
             task_status = {
                 "task_id": task_id,
                 "session_id": redis_data.get("session_id"),
                 "url": redis_data.get("url"),
-                "user_id": int(redis_data.get("user_id", 0)),
-                "priority": int(redis_data.get("priority", 1)),
+                "user_id": redis_data.get("user_id", 0),
+                "priority": redis_data.get("priority", 1),
                 "created_at": redis_data.get("created_at"),
                 "updated_at": redis_data.get("updated_at"),
                 "status": redis_data.get("status"),
@@ -106,25 +136,9 @@ class RedisQueueService:
                 "celery_result": celery_result_data,
                 "error": redis_data.get("error"),
             }
-
-            # Update status based on Celery state
-            if celery_status == "PENDING":
-                task_status["status"] = "queued"
-            elif celery_status == "STARTED":
-                task_status["status"] = "processing"
-            elif celery_status == "SUCCESS":
-                task_status["status"] = "completed"
+            if celery_status == "SUCCESS":
                 task_status["result"] = celery_result_data
-            elif celery_status == "FAILURE":
-                task_status["status"] = "failed"
-                task_status["error"] = str(celery_result_data)
-            elif celery_status == "RETRY":
-                task_status["status"] = "retrying"
-            elif celery_status == "REVOKED":
-                task_status["status"] = "cancelled"
-
-            # Update Redis with latest status
-            await self._update_redis_status(task_id, task_status["status"], task_status.get("error"))
+            logger.info(f"Task status updated: {task_id} -> {task_status['status']}")
 
             return task_status
 
@@ -143,23 +157,10 @@ class RedisQueueService:
     async def _update_redis_status(self, task_id: str, status: str, error: Optional[str] = None, result: Optional[Dict] = None) -> bool:
         """Internal method to update Redis task status"""
         try:
-            task_key = f"task:{task_id}"
-
-            # Check if task exists
-            exists = await self.redis_client.exists(task_key)
-            if not exists:
+            if not await self._update_redis_fields(task_id, status, error, result):
                 logger.warning(f"Task not found for update: {task_id}")
                 return False
 
-            update_data = {"status": status, "updated_at": datetime.utcnow().isoformat()}
-
-            if result:
-                update_data["result"] = json.dumps(result)
-
-            if error:
-                update_data["error"] = error
-
-            await self.redis_client.hset(task_key, mapping=update_data)
             logger.info(f"Task status updated: {task_id} -> {status}")
             return True
 
@@ -167,6 +168,35 @@ class RedisQueueService:
             logger.error(f"Error updating Redis status: {str(e)}")
             return False
 
+    async def _update_redis_fields(self, task_id: str, status: Optional[str], error: Optional[str] = None, result: Optional[Dict] = None) -> Dict[str, Any]:
+        """Update task fields only if the task exists, returning the updated task data (empty if not found)"""
+        update_data = {"updated_at": datetime.utcnow().isoformat()}
+
+        if status:
+            update_data["status"] = status
+
+        if result:
+            update_data["result"] = result
+
+        if error:
+            update_data["error"] = error
+
+        task_key = f"task:{task_id}"
+
+        # Read-merge-write in Python under WATCH so the JSON is only ever encoded by orjson
+        # (retried by transaction() if the key changes between GET and EXEC)
+        async def merge(pipe) -> Dict[str, Any]:
+            raw = await pipe.get(task_key)
+            if not raw:
+                return {}
+            data = orjson.loads(raw)
+            data.update(update_data)
+            pipe.multi()
+            pipe.set(task_key, orjson.dumps(data), keepttl=True)
+            return data
+
+        return await self.redis_client.transaction(merge, task_key, value_from_callable=True)
+
     async def cancel_task(self, task_id: str) -> bool:
         """Cancel a Celery task"""
         try:
@@ -186,16 +216,25 @@ class RedisQueueService:
             return False
 
     async def get_queue_length(self) -> int:
-        """Get approximate queue length (Celery active tasks)"""
+        """Get approximate queue length (Celery active tasks)
+
+        inspect().active() is a broadcast RPC to every worker, so the result is shared through Redis for
+        QUEUE_LENGTH_TTL seconds and only one caller at a time refreshes it (in a worker thread).
+        """
         try:
-            inspect = self.celery_app.control.inspect()
-            active_tasks = inspect.active()
+            cached = await self.redis_client.get(QUEUE_LENGTH_KEY)
+            if cached is not None:
+                return int(cached)
 
-            if active_tasks:
-                total_tasks = sum(len(tasks) for tasks in active_tasks.values())
-                return total_tasks
+            # Another caller is already sampling; report 0 rather than fanning out another RPC
+            if not await self.redis_client.set(QUEUE_LENGTH_LOCK_KEY, 1, nx=True, ex=QUEUE_LENGTH_TTL):
+                return 0
 
-            return 0
+            active_tasks = await asyncio.to_thread(self.celery_app.control.inspect().active)
+            total_tasks = sum(len(tasks) for tasks in active_tasks.values()) if active_tasks else 0
+
+            await self.redis_client.set(QUEUE_LENGTH_KEY, total_tasks, ex=QUEUE_LENGTH_TTL)
+            return total_tasks
 
         except Exception as e:
             logger.error(f"Error getting queue length: {str(e)}")
@@ -216,18 +255,22 @@ class RedisQueueService:
             return None
 
     async def cleanup_expired_tasks(self) -> int:
-        """Clean up expired task data from Redis"""
+        """Clean up expired task data from Redis
+
+        Only touches tasks whose expiry has passed, found via the TASK_EXPIRY_ZSET index (never uses KEYS).
+        """
         try:
-            task_keys = await self.redis_client.keys("task:*")
-            cleaned_count = 0
+            now = time.time()
+            expired_ids = await self.redis_client.zrangebyscore(TASK_EXPIRY_ZSET, 0, now)
 
-            for task_key in task_keys:
-                ttl = await self.redis_client.ttl(task_key)
-                if ttl == -2:  # Key doesn't exist
-                    cleaned_count += 1
-                elif ttl == -1:  # No expiration set
-                    await self.redis_client.expire(task_key, 3600)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                if expired_ids:
+                    # Normally already gone through their TTL; delete any leftovers
+                    pipe.unlink(*(f"task:{task_id.decode() if isinstance(task_id, bytes) else task_id}" for task_id in expired_ids))
+                pipe.zremrangebyscore(TASK_EXPIRY_ZSET, 0, now)
+                await pipe.execute()
 
+            cleaned_count = len(expired_ids)
             logger.info(f"Cleaned up {cleaned_count} expired tasks")
             return cleaned_count
 
@@ -1,21 +1,19 @@
-import base64
-import json
-from typing import Optional, Tuple
-
-import redis.asyncio as redis
+import logging
+import warnings
+from typing import Dict, Optional, Tuple
 
+from app.core.cache import cache_redis_client
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 class RedisCacheService:
     """Redis画像キャッシュサービス"""
     
     def __init__(self):
-        self.redis_client = redis.from_url(
-            settings.REDIS_URL,
-            encoding="utf-8",
-            decode_responses=False  # バイナリデータのためFalse
-        )
+        # 接続プールはプロセス全体で共有する（app.core.cacheを参照）
+        self.redis_client = cache_redis_client
     
     async def cache_image(
         self, 
@@ -30,19 +28,16 @@ class RedisCacheService:
             if len(image_data) > settings.REDIS_MAX_IMAGE_SIZE:
                 return False
                 
+            # 画像は生のバイト列のまま、content_type・サイズは別キーのハッシュに保存する
+            # （base64やJSONへの変換をせず、1往復のパイプラインで書き込む）
             cache_key = f"image:{file_path}"
-            cache_value = {
-                "data": base64.b64encode(image_data).decode('utf-8'),
-                "content_type": content_type,
-                "size": len(image_data)
-            }
-            
+            meta_key = f"{cache_key}:meta"
             ttl = expiration or settings.REDIS_IMAGE_CACHE_TTL
-            await self.redis_client.setex(
-                cache_key,
-                ttl,
-                json.dumps(cache_value)
-            )
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.setex(cache_key, ttl, image_data)
+                pipe.hset(meta_key, mapping={"content_type": content_type, "size": len(image_data)})
+                pipe.expire(meta_key, ttl)
+                await pipe.execute()
             return True
         except Exception as e:
             print(f"Redis cache error: {e}")
@@ -63,6 +58,27 @@ class RedisCacheService:
             print(f"Redis cache error: {e}")
             return False
 
+    async def cache_data_many(
+        self,
+        items: Dict[str, bytes],
+        expiration: Optional[int] = None
+    ) -> bool:
+        """複数の汎用データを1回のパイプラインでまとめてRedisにキャッシュ
+
+        1回あたり100件程度にまとめると往復回数の削減効果が大きい。
+        """
+        if not items:
+            return True
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key, data in items.items():
+                    pipe.set(f"data:{key}", data, ex=expiration)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis cache error: {e}")
+            return False
+
     async def get_cached_data(self, key: str) -> Optional[bytes]:
         """Redisから汎用データを取得"""
         try:
@@ -74,55 +90,68 @@ class RedisCacheService:
             return None
 
     async def get_cached_image(self, file_path: str) -> Optional[Tuple[bytes, str]]:
-        """Redisから画像を取得"""
+        """Redisから画像を取得（キャッシュがない場合はNone。存在確認はこの1回の呼び出しで兼ねる）"""
         try:
             cache_key = f"image:{file_path}"
-            cached_data = await self.redis_client.get(cache_key)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.get(cache_key)
+                pipe.hget(f"{cache_key}:meta", "content_type")
+                image_data, content_type = await pipe.execute()
             
-            if not cached_data:
+            if not image_data or not content_type:
                 return None
             
-            cache_value = json.loads(cached_data)
-            image_data = base64.b64decode(cache_value["data"])
-            content_type = cache_value["content_type"]
-            
-            return image_data, content_type
+            return image_data, content_type.decode()
         except Exception as e:
             print(f"Redis get error: {e}")
             return None
     
     async def cache_exists(self, file_path: str) -> bool:
-        """キャッシュの存在確認"""
+        """キャッシュの存在確認（非推奨）
+
+        存在確認のあとにget_cached_imageを呼ぶと往復が2回になる。
+        get_cached_imageはキャッシュがなければNoneを返すので、そちらを1回呼ぶこと。
+        """
+        warnings.warn(
+            "cache_exists() is deprecated; call get_cached_image() and check for None instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
         cache_key = f"image:{file_path}"
         return await self.redis_client.exists(cache_key) > 0
     
     async def delete_cache(self, file_path: str) -> bool:
         """キャッシュを削除"""
         cache_key = f"image:{file_path}"
-        deleted = await self.redis_client.delete(cache_key)
+        deleted = await self.redis_client.delete(cache_key, f"{cache_key}:meta")
         return deleted > 0
     
     async def get_cache_info(self, file_path: str) -> Optional[dict]:
         """キャッシュ情報を取得"""
         try:
             cache_key = f"image:{file_path}"
-            cached_data = await self.redis_client.get(cache_key)
+            meta, ttl = await self._hgetall_with_ttl(f"{cache_key}:meta", cache_key)
             
-            if not cached_data:
+            if not meta:
                 return None
             
-            cache_value = json.loads(cached_data)
-            ttl = await self.redis_client.ttl(cache_key)
-            
             return {
-                "size": cache_value["size"],
-                "content_type": cache_value["content_type"],
+                "size": int(meta[b"size"]),
+                "content_type": meta[b"content_type"].decode(),
                 "ttl": ttl,
                 "cached": True
             }
         except Exception:
             return None
     
+    async def _hgetall_with_ttl(self, hash_key: str, ttl_key: str) -> Tuple[dict, int]:
+        """ハッシュの全フィールドとキーの残りTTLを1往復のパイプラインで取得"""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(hash_key)
+            pipe.ttl(ttl_key)
+            meta, ttl = await pipe.execute()
+        return meta, ttl
+    
     async def close(self):
-        """Redis接続を閉じる"""
-        await self.redis_client.close()
\ No newline at end of file
+        """Redis接続を閉じる（共有の接続プール自体は閉じない）"""
+        await self.redis_client.aclose(close_connection_pool=False)
\ No newline at end of file
@@ -1,11 +1,25 @@
+import logging
 from datetime import datetime
 from typing import List, Optional
 
+from sqlalchemy import func, insert, update
 from sqlalchemy.orm import Session
 
 from app.models.shopping import Shopping, ShoppingItem, UserShopping
+from app.schemas.shopping import Shopping as ShoppingSchema
 from app.schemas.shopping import ShoppingItemCreate, ShoppingItemUpdate, ShoppingList
 
+logger = logging.getLogger(__name__)
+
+# 買い物リスト一覧の応答に必要な列
+_SHOPPING_LIST_COLUMNS = (
+    Shopping.id,
+    Shopping.recipe_id,
+    Shopping.list_name,
+    Shopping.created_date,
+    Shopping.updated_date,
+)
+
 
 class ShoppingService:
     """ショッピングサービス"""
@@ -13,25 +27,44 @@ class ShoppingService:
     def __init__(self, db: Session):
         self.db = db
 
+    def _commit(self) -> None:
+        """コミットし、失敗した場合はロールバックしてから例外を再送出する"""
+        try:
+            self.db.commit()
+        except Exception:
+            logger.exception("Transaction failed, rolling back")
+            self.db.rollback()
+            raise
+        logger.debug("Transaction committed")
+
     def get_lists_with_pagination(self, user_id: int, page: int, per_page: int, keyword: Optional[str]) -> ShoppingList:
-        query = self.db.query(Shopping).join(UserShopping).filter(
+        # 一覧に必要な列だけを取得し（ORMオブジェクトは作らない）、
+        # 総件数はウィンドウ関数で各行に付けて返し、COUNT用の2回目のクエリを省く
+        query = self.db.query(*_SHOPPING_LIST_COLUMNS, func.count().over().label("total")).join(UserShopping).filter(
             UserShopping.user_id == user_id
         ).order_by(Shopping.created_date.desc())
         if keyword:
             query = query.filter(Shopping.list_name.ilike(f"%{keyword}%"))
-        total = query.count()
+        rows = query.offset((page - 1) * per_page).limit(per_page).all()
+        if rows:
+            total = rows[0].total
+        elif page > 1:
+            # 最終ページより後ろを指定された場合は行がないため、件数だけ別途数える
+            total = query.with_entities(Shopping.id).order_by(None).count()
+        else:
+            total = 0
         pages = (total + per_page - 1) // per_page
-        items = query.offset((page - 1) * per_page).limit(per_page).all()
+        # DBから読み出した信頼済みの値なので、検証なしで応答スキーマを組み立てる
         item_list = [
-            Shopping(
-                id=item.id,
-                recipe_id=item.recipe_id,
-                list_name=item.list_name,
-                created_date=item.created_date.isoformat(),
-                updated_date=item.updated_date.isoformat()
-            ) for item in items
+            ShoppingSchema.model_construct(
+                id=row.id,
+                recipe_id=row.recipe_id,
+                list_name=row.list_name,
+                created_date=row.created_date,
+                updated_date=row.updated_date,
+            ) for row in rows
         ]
-        return ShoppingList(
+        return ShoppingList.model_construct(
             items=item_list,
             total=total,
             page=page,
@@ -76,33 +109,21 @@ class ShoppingService:
         user_shopping.is_favorite = is_favorite
         user_shopping.updated_date = datetime.utcnow()
         self.db.commit()
-        self.db.refresh(user_shopping)
         return user_shopping
 
     def create_list(self, recipe_id: int, list_name: str) -> Shopping:
-        new_list = Shopping(
-            recipe_id=recipe_id,
-            list_name=list_name,
-            created_date=datetime.utcnow(),
-            updated_date=datetime.utcnow()
-        )
-        self.db.add(new_list)
-        try:
-            self.db.commit()
-            print("Transaction committed successfully")
-        except Exception as e:
-            print(f"Transaction failed: {e}")
-            self.db.rollback()
-            print("Transaction rolled back")
-            raise e
-        self.db.refresh(new_list)
-        return Shopping(
-            id=new_list.id,
-            recipe_id=new_list.recipe_id,
-            list_name=new_list.list_name,
-            created_date=new_list.created_date.isoformat(),
-            updated_date=new_list.updated_date.isoformat()
-        )
+        # INSERT ... RETURNING で採番されたIDを受け取り、commit後のrefreshによるSELECTを省く
+        now = datetime.utcnow()
+        new_list = self.db.scalars(
+            insert(Shopping).values(
+                recipe_id=recipe_id,
+                list_name=list_name,
+                created_date=now,
+                updated_date=now
+            ).returning(Shopping)
+        ).one()
+        self._commit()
+        return new_list
 
     def get_shopping(self, shopping_id: int, user_id: int) -> Optional[Shopping]:
         shopping = self.db.query(Shopping).join(UserShopping).filter(
@@ -113,106 +134,72 @@ class ShoppingService:
             return None
         return shopping
     
+    @staticmethod
+    def _item_rows(items: List[ShoppingItemCreate]) -> List[dict]:
+        """アイテム作成スキーマをINSERT用のパラメータに変換（作成日時・更新日時は全行で同じ値にする）"""
+        now = datetime.utcnow()
+        return [
+            {
+                "shopping_id": item.shopping_id,
+                "ingredient": item.ingredient,
+                "amount": item.amount,
+                "is_checked": item.is_checked,
+                "created_date": now,
+                "updated_date": now,
+            } for item in items
+        ]
+
     def create_items(self, items: List[ShoppingItemCreate]) -> List[ShoppingItem]:
         """ショッピングリストアイテムを一括で作成する"""
         if not items:
             return []
-        items = [
-            ShoppingItem(
-                shopping_id=item.shopping_id,
-                ingredient=item.ingredient,
-                amount=item.amount,
-                is_checked=item.is_checked,
-                created_date=datetime.utcnow(),
-                updated_date=datetime.utcnow()
-            ) for item in items
-        ]
-        self.db.add_all(items)
-        try:
-            self.db.commit()
-            print("Transaction committed successfully")
-        except Exception as e:
-            print(f"Transaction failed: {e}")
-            self.db.rollback()
-            print("Transaction rolled back")
-            raise e
-        for item in items:
-            self.db.refresh(item)
-        return [
-            ShoppingItem(
-                id=item.id,
-                ingredient=item.ingredient,
-                amount=item.amount,
-                is_checked=item.is_checked,
-                created_date=item.created_date.isoformat(),
-                updated_date=item.updated_date.isoformat()
-            ) for item in items
-        ]
+        # 複数行INSERT ... RETURNING 1文で作成し、行ごとのrefreshを行わない
+        stmt = insert(ShoppingItem).returning(ShoppingItem, sort_by_parameter_order=True)
+        created = self.db.scalars(stmt, self._item_rows(items)).all()
+        self._commit()
+        return created
+
+    def create_items_fast(self, items: List[ShoppingItemCreate]) -> int:
+        """ショッピングリストアイテムを一括で作成し、作成件数だけを返す
+
+        作成した行を返さないためRETURNINGもORMオブジェクトの生成も行わず、
+        executemany（values_plus_batchで複数行INSERTにまとめられる）で書き込む。
+        """
+        if not items:
+            return 0
+        self.db.execute(insert(ShoppingItem), self._item_rows(items))
+        self._commit()
+        return len(items)
 
     def create_user_shopping(self, shopping_id: int, user_id: int) -> UserShopping:
+        now = datetime.utcnow()
         new_user_shopping = UserShopping(
             shopping_id=shopping_id,
             user_id=user_id,
             is_favorite=False,
-            created_date=datetime.utcnow(),
-            updated_date=datetime.utcnow()
+            created_date=now,
+            updated_date=now
         )
         self.db.add(new_user_shopping)
-        try:
-            self.db.commit()
-            print("Transaction committed successfully")
-        except Exception as e:
-            print(f"Transaction failed: {e}")
-            self.db.rollback()
-            print("Transaction rolled back")
-            raise e
-        self.db.refresh(new_user_shopping)
-        return UserShopping(
-            id=new_user_shopping.id,
-            shopping_id=new_user_shopping.shopping_id,
-            user_id=new_user_shopping.user_id,
-            is_favorite=new_user_shopping.is_favorite,
-            created_date=new_user_shopping.created_date.isoformat(),
-            updated_date=new_user_shopping.updated_date.isoformat()
-        )
+        self._commit()
+        return new_user_shopping
 
     def get_items(self, shopping_id: int) -> List[ShoppingItem]:
         items = self.db.query(ShoppingItem).filter(
             ShoppingItem.shopping_id == shopping_id
         ).all()
-        return [
-            ShoppingItem(
-                id=item.id,
-                shopping_id=item.shopping_id,
-                ingredient=item.ingredient,
-                amount=item.amount,
-                is_checked=item.is_checked,
-                created_date=item.created_date.isoformat(),
-                updated_date=item.updated_date.isoformat()
-            ) for item in items
-        ]
+        return items
 
     def update_item(self, shopping_item_id: int, req: ShoppingItemUpdate) -> Optional[ShoppingItem]:
-        item = self.db.query(ShoppingItem).filter(
-            ShoppingItem.id == shopping_item_id
+        """アイテムを更新（存在確認のSELECTを行わず、UPDATE ... RETURNING 1文で更新する）"""
+        values = req.model_dump(include={"ingredient", "amount", "is_checked"}, exclude_none=True)
+        values["updated_date"] = datetime.utcnow()
+        item = self.db.scalars(
+            update(ShoppingItem).where(ShoppingItem.id == shopping_item_id).values(**values).returning(ShoppingItem)
+            .execution_options(synchronize_session=False, populate_existing=True)
         ).first()
         if not item:
+            self.db.rollback()
             return None
-        if req.ingredient is not None:
-            item.ingredient = req.ingredient
-        if req.amount is not None:
-            item.amount = req.amount
-        if req.is_checked is not None:
-            item.is_checked = req.is_checked
-        item.updated_date = datetime.utcnow()
         self.db.commit()
-        self.db.refresh(item)
-        return ShoppingItem(
-            id=item.id,
-            shopping_id=item.shopping_id,
-            ingredient=item.ingredient,
-            amount=item.amount,
-            is_checked=item.is_checked,
-            created_date=item.created_date.isoformat(),
-            updated_date=item.updated_date.isoformat()
-        )
\ No newline at end of file
+        return item
\ No newline at end of file
@@ -1,9 +1,12 @@
-from typing import Any, Dict, List
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import aioboto3
+from aiobotocore.config import AioConfig
 from botocore.exceptions import ClientError
 
 from app.core.config import settings
+from app.services.redis_service import RedisCacheService
 
 
 class StorageService:
@@ -20,6 +23,35 @@ class StorageService:
         )
         self.bucket_name = settings.STORAGE_BUCKET_NAME
         self.endpoint_url = settings.MINIO_ENDPOINT_URL
+        # 接続プールを使い回し、アイドル中の接続もTCPキープアライブで維持する
+        self.config = AioConfig(max_pool_connections=50, tcp_keepalive=True)
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._s3 = None
+
+    async def startup(self) -> None:
+        """アプリ起動時にS3クライアントを1つ作成し、以降のリクエストで使い回す"""
+        if self._s3 is not None:
+            return
+        self._exit_stack = AsyncExitStack()
+        self._s3 = await self._exit_stack.enter_async_context(
+            self.session.client('s3', endpoint_url=self.endpoint_url, config=self.config)
+        )
+
+    async def shutdown(self) -> None:
+        """共有のS3クライアントを閉じる"""
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._exit_stack = None
+        self._s3 = None
+
+    @asynccontextmanager
+    async def _client(self) -> AsyncIterator[Any]:
+        """S3クライアントを取得（startup済みなら共有クライアント、そうでなければ一時的なクライアント）"""
+        if self._s3 is not None:
+            yield self._s3
+            return
+        async with self.session.client('s3', endpoint_url=self.endpoint_url, config=self.config) as s3:
+            yield s3
 
     async def list_files(self, prefix: str = "") -> List[Dict[str, Any]]:
         """指定したプレフィックス以下のファイル一覧を取得
@@ -30,22 +62,22 @@ class StorageService:
         Returns:
             List[Dict[str, Any]]: ファイル情報のリスト
         """
-        async with self.session.client('s3', endpoint_url=self.endpoint_url) as minio:
-            response = await minio.list_objects_v2(Bucket=self.bucket_name, Prefix=prefix)
-            if 'Contents' not in response:
-                return []
-                
-            result = []
-            for item in response["Contents"]:
-                url = f"{self.endpoint_url}/{self.bucket_name}/{item['Key']}"
-                    
-                result.append({
-                    "key": item["Key"],
-                    "size": item["Size"],
-                    "last_modified": item["LastModified"],
-                    "url": url
-                })
-            return result
+        # list_objects_v2は1回あたり最大1000件なので、ページネーターで続きも取得する
+        url_prefix = f"{self.endpoint_url}/{self.bucket_name}/"
+        result: List[Dict[str, Any]] = []
+        async with self._client() as minio:
+            paginator = minio.get_paginator('list_objects_v2')
+            async for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                result.extend(
+                    {
+                        "key": item["Key"],
+                        "size": item["Size"],
+                        "last_modified": item["LastModified"],
+                        "url": url_prefix + item["Key"],
+                    }
+                    for item in page.get("Contents", ())
+                )
+        return result
         
     async def download_file(self, path: str) -> bytes:
         """ファイルをダウンロードする
@@ -59,7 +91,7 @@ class StorageService:
         Raises:
             ClientError: ファイルが見つからない、またはアクセスできない場合
         """
-        async with self.session.client('s3', endpoint_url=self.endpoint_url) as s3:
+        async with self._client() as s3:
             try:
                 response = await s3.get_object(Bucket=self.bucket_name, Key=path)
                 async with response['Body'] as stream:
@@ -68,4 +100,22 @@ class StorageService:
                 error_code = e.response.get('Error', {}).get('Code')
                 if error_code == 'NoSuchKey':
                     raise FileNotFoundError(f"File not found: {path}")
-                raise
\ No newline at end of file
+                raise
+
+
+    async def download_and_cache(self, path: str, cache: RedisCacheService, content_type: str) -> bytes:
+        """ファイルをダウンロードし、同じバイト列をそのままRedisにキャッシュする
+
+        ダウンロードしたバイト列はコピーや変換をせずにキャッシュへ書き込み、呼び出し元にも同じものを返す。
+        キャッシュへの書き込みに失敗してもダウンロード結果は返す。
+
+        Raises:
+            FileNotFoundError: ファイルが見つからない場合
+        """
+        contents = await self.download_file(path)
+        if contents and len(contents) <= settings.REDIS_MAX_IMAGE_SIZE:
+            await cache.cache_image(path, contents, content_type)
+        return contents
+
+# アプリ全体で共有するインスタンス（main.pyのlifespanでstartup/shutdownする）
+storage_service = StorageService()
\ No newline at end of file
@@ -1,36 +1,72 @@
 import logging
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.request_context import RequestNowMiddleware
+from app.core.responses import ORJSONResponse
 from app.log.logging_config import setup_logging
+from app.services.mongodb_cooking_service import MongoDBCookingService
+from app.services.mongodb_recipe_generation_service import MongoDBRecipeGenerationService
+from app.services.storage_service import storage_service
 
 setup_logging()
 logger = logging.getLogger("fastapi")
 
-if os.getenv("OPENAPI_URL"):
-    openapi_url = os.getenv("OPENAPI_URL")
+# 環境変数は起動時に一度だけ読み込む
+openapi_url = os.getenv("OPENAPI_URL")
+# 前後の空白と空要素を除き、重複を取り除いた許可オリジン（順序は維持する）
+allowed_origins = tuple(dict.fromkeys(
+    origin.strip() for origin in os.getenv("ALLOWED_ORIGINS", "").split(",") if origin.strip()
+))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """起動時にMongoDBのインデックスを作成し（失敗しても起動は継続）、共有のS3クライアントを用意する"""
+    client = AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=5000)
+    try:
+        mongodb = client[settings.MONGODB_DB_NAME]
+        await MongoDBRecipeGenerationService.ensure_indexes(mongodb)
+        await MongoDBCookingService.ensure_indexes(mongodb)
+        logger.info("MongoDBのインデックスを確認しました")
+    except Exception as e:
+        logger.warning(f"MongoDBのインデックス作成に失敗しました: {e}")
+    finally:
+        client.close()
+    try:
+        await storage_service.startup()
+    except Exception as e:
+        # 共有クライアントを作れなかった場合は、リクエストごとにクライアントを作る動作になる
+        logger.warning(f"S3クライアントの初期化に失敗しました: {e}")
+    try:
+        yield
+    finally:
+        await storage_service.shutdown()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version="1.0.0",
-    openapi_url=openapi_url+"/openapi.json" if os.getenv("OPENAPI_URL") else "/openapi.json",
+    openapi_url=openapi_url+"/openapi.json" if openapi_url else "/openapi.json",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
-origins = []
-
-if os.getenv("ALLOWED_ORIGINS"):
-    origins.extend(os.getenv("ALLOWED_ORIGINS").split(","))
-
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=origins,     # List of allowed origins
-    allow_credentials=True,    # Allow cookies
-    allow_methods=["*"],       # Allow all methods
-    allow_headers=["*"],       # Allow all headers
+    allow_origins=allowed_origins,  # List of allowed origins
+    allow_credentials=True,         # Allow cookies
+    allow_methods=("GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"),
+    allow_headers=["*"],            # Allow all headers
+    max_age=86400,                  # Let browsers cache preflight responses for a day
 )
 
+app.add_middleware(RequestNowMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
\ No newline at end of file